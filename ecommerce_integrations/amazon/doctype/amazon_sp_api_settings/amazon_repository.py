@@ -15,11 +15,18 @@ from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_sp_api
 	Finances,
 	Orders,
 	SPAPIError,
+	SPAPIThrottledError,
+	get_backoff_delay,
+	get_rate_limiter,
 )
 from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_sp_api_settings import (
 	AmazonSPAPISettings,
 )
 
+# Throttled requests are retried with backoff and don't count towards `max_retry_limit`
+# till this many retries.
+MAX_THROTTLED_RETRIES = 8
+
 
 class AmazonRepository:
 	def __init__(self, amz_setting: str | AmazonSPAPISettings) -> None:
@@ -46,15 +53,31 @@ class AmazonRepository:
 	def call_sp_api_method(self, sp_api_method, **kwargs) -> dict:
 		errors = {}
 		max_retries = self.amz_setting.max_retry_limit
+		rate_limiter = get_rate_limiter(self.amz_setting.name, sp_api_method.__name__)
 
-		for _x in range(max_retries):
+		retries = throttled = 0
+		while retries < max_retries:
+			rate_limiter.acquire()
 			try:
 				result = sp_api_method(**kwargs)
+				rate_limiter.update_rate(getattr(sp_api_method.__self__, "rate_limit", None))
 				return result.get("payload")
+			except SPAPIThrottledError as e:
+				rate_limiter.update_rate(e.rate_limit)
+				rate_limiter.drain()
+				throttled += 1
+				if throttled <= MAX_THROTTLED_RETRIES:
+					time.sleep(get_backoff_delay(throttled))
+					continue
+
+				if e.error not in errors:
+					errors[e.error] = e.error_description
+				retries += 1
 			except SPAPIError as e:
 				if e.error not in errors:
 					errors[e.error] = e.error_description
 
+				retries += 1
 				time.sleep(1)
 				continue
 
@@ -242,15 +265,38 @@ class AmazonRepository:
 
 		return item.item_code
 
-	def get_item_code(self, order_item) -> str:
+	def get_item_codes(self, order_items) -> dict[str, str]:
+		"""Find existing items of all order items using a single query.
+
+		Returns map of Amazon field value to item code, pass it to `get_item_code`."""
 		for field_map in self.amz_setting.amazon_fields_map:
 			if field_map.use_to_find_item_code:
-				item_code = frappe.db.get_value(
-					"Item",
-					filters={field_map.item_field: order_item[field_map.amazon_field]},
-					fieldname="item_code",
+				values = {order_item.get(field_map.amazon_field) for order_item in order_items} - {None}
+				if not values:
+					return {}
+
+				return dict(
+					frappe.get_all(
+						"Item",
+						filters={field_map.item_field: ("in", list(values))},
+						fields=[field_map.item_field, "item_code"],
+						as_list=True,
+					)
 				)
 
+		return {}
+
+	def get_item_code(self, order_item, item_codes: dict[str, str] | None = None) -> str:
+		for field_map in self.amz_setting.amazon_fields_map:
+			if field_map.use_to_find_item_code:
+				item_code = (item_codes or {}).get(order_item[field_map.amazon_field])
+				if not item_code:
+					item_code = frappe.db.get_value(
+						"Item",
+						filters={field_map.item_field: order_item[field_map.amazon_field]},
+						fieldname="item_code",
+					)
+
 				if item_code:
 					return item_code
 				elif not self.amz_setting.create_item_if_not_exists:
@@ -274,27 +320,14 @@ class AmazonRepository:
 		orders = self.get_orders_instance()
 		order_items_payload = self.call_sp_api_method(sp_api_method=orders.get_order_items, order_id=order_id)
 
-		final_order_items = []
+		order_items = []
 		warehouse = self.amz_setting.warehouse
 
 		while True:
 			order_items_list = order_items_payload.get("OrderItems")
 			next_token = order_items_payload.get("NextToken")
 
-			for order_item in order_items_list:
-				if order_item.get("QuantityOrdered") > 0:
-					final_order_items.append(
-						{
-							"item_code": self.get_item_code(order_item),
-							"item_name": order_item.get("SellerSKU"),
-							"description": order_item.get("Title"),
-							"rate": order_item.get("ItemPrice", {}).get("Amount", 0),
-							"qty": order_item.get("QuantityOrdered"),
-							"stock_uom": "Nos",
-							"warehouse": warehouse,
-							"conversion_factor": 1.0,
-						}
-					)
+			order_items.extend(d for d in order_items_list if d.get("QuantityOrdered") > 0)
 
 			if not next_token:
 				break
@@ -305,6 +338,22 @@ class AmazonRepository:
 				next_token=next_token,
 			)
 
+		item_codes = self.get_item_codes(order_items)
+		final_order_items = []
+		for order_item in order_items:
+			final_order_items.append(
+				{
+					"item_code": self.get_item_code(order_item, item_codes),
+					"item_name": order_item.get("SellerSKU"),
+					"description": order_item.get("Title"),
+					"rate": order_item.get("ItemPrice", {}).get("Amount", 0),
+					"qty": order_item.get("QuantityOrdered"),
+					"stock_uom": "Nos",
+					"warehouse": warehouse,
+					"conversion_factor": 1.0,
+				}
+			)
+
 		return final_order_items
 
 	def create_sales_order(self, order) -> str | None:
@@ -499,10 +548,10 @@ def validate_amazon_sp_api_credentials(**args) -> None:
 
 	try:
 		# validate client_id, client_secret and refresh_token.
-		api.get_access_token()
+		api.get_access_token(use_cache=False)
 
 		# validate aws_access_key, aws_secret_key, region and iam_arn.
-		api.get_auth()
+		api.get_auth(use_cache=False)
 
 	except SPAPIError as e:
 		msg = f"<b>Error:</b> {e.error}<br/><b>Error Description:</b> {e.error_description}"
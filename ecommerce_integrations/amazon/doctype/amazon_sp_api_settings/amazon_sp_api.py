@@ -5,6 +5,9 @@
 import datetime
 import hashlib
 import hmac
+import random
+import threading
+import time
 
 import boto3
 from requests import request
@@ -13,6 +16,7 @@ from requests.compat import urlparse
 
 __all__ = [
 	"SPAPIError",
+	"SPAPIThrottledError",
 	"Finances",
 	"Orders",
 	"CatalogItems",
@@ -55,6 +59,17 @@ MARKETPLACES = {
 	},
 }
 
+# Default usage plans, (rate in requests per second, burst), for each operation. Actual rate
+# is updated from `x-amzn-RateLimit-Limit` response header.
+# https://developer-docs.amazon.com/sp-api/docs/usage-plans-and-rate-limits-in-the-sp-api
+RATE_LIMITS = {
+	"get_orders": (0.0167, 20),
+	"get_order_items": (0.5, 30),
+	"list_financial_events_by_order_id": (0.5, 30),
+	"get_catalog_item": (2, 20),
+}
+DEFAULT_RATE_LIMIT = (0.5, 10)
+
 # Following code is adapted from https://github.com/andrewjroth/requests-auth-aws-sigv4 under the Apache License 2.0 with minor changes.
 
 # Copyright 2020 Andrew J Roth <andrew@andrewjroth.com>
@@ -194,6 +209,51 @@ class AWSSigV4(AuthBase):
 		return request
 
 
+class CredentialCache:
+	"""Process-local cache for short-lived SP-API credentials.
+
+	LWA access tokens and STS assumed-role credentials are valid for an hour, so they are
+	cached till shortly before expiry and shared by all SP-API instances using same credentials.
+	"""
+
+	# refresh credentials this many seconds before they actually expire.
+	EXPIRY_MARGIN = 300
+
+	def __init__(self) -> None:
+		self._store: dict[str, tuple[object, float]] = {}
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	@staticmethod
+	def make_key(*parts: str) -> str:
+		return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+	def get(self, key: str):
+		with self._lock:
+			value, expires_at = self._store.get(key, (None, 0))
+			if value is not None and time.time() < expires_at - self.EXPIRY_MARGIN:
+				self.hits += 1
+				return value
+
+			self._store.pop(key, None)
+			self.misses += 1
+
+	def set(self, key: str, value, expires_at: float) -> None:
+		with self._lock:
+			self._store[key] = (value, expires_at)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._store.clear()
+
+	def get_stats(self) -> dict:
+		return {"hits": self.hits, "misses": self.misses, "cached": len(self._store)}
+
+
+credential_cache = CredentialCache()
+
+
 class SPAPIError(Exception):
 	"""
 	Main SP-API Exception class
@@ -205,6 +265,74 @@ class SPAPIError(Exception):
 		super().__init__(*args)
 
 
+class SPAPIThrottledError(SPAPIError):
+	"""Request was throttled (HTTP 429) by SP-API."""
+
+	def __init__(self, *args, **kwargs) -> None:
+		self.rate_limit = kwargs.pop("rate_limit", None)
+		super().__init__(*args, **kwargs)
+
+
+class TokenBucket:
+	"""Token bucket rate limiter for a single SP-API operation.
+
+	Bucket holds at most `burst` tokens and refills at `rate` tokens per second,
+	each request consumes one token.
+	"""
+
+	def __init__(self, rate: float, burst: int) -> None:
+		self.rate = rate
+		self.burst = burst
+		self.tokens = float(burst)
+		self.updated_at = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _refill(self) -> None:
+		now = time.monotonic()
+		self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+		self.updated_at = now
+
+	def acquire(self) -> None:
+		"""Block till a token is available and consume it."""
+		while True:
+			with self._lock:
+				self._refill()
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return
+				wait = (1 - self.tokens) / self.rate
+			time.sleep(wait)
+
+	def update_rate(self, rate: float | None) -> None:
+		"""Update refill rate as reported by SP-API."""
+		if rate and rate > 0:
+			with self._lock:
+				self._refill()
+				self.rate = rate
+
+	def drain(self) -> None:
+		"""Empty the bucket, used when SP-API throttles a request."""
+		with self._lock:
+			self.tokens = 0
+			self.updated_at = time.monotonic()
+
+
+_rate_limiters: dict[tuple[str, str], TokenBucket] = {}
+
+
+def get_rate_limiter(key: str, operation: str) -> TokenBucket:
+	"""Get process-wide rate limiter for specified operation and selling partner."""
+	if (key, operation) not in _rate_limiters:
+		rate, burst = RATE_LIMITS.get(operation, DEFAULT_RATE_LIMIT)
+		_rate_limiters[(key, operation)] = TokenBucket(rate, burst)
+	return _rate_limiters[(key, operation)]
+
+
+def get_backoff_delay(attempt: int, base: float = 1, cap: float = 60) -> float:
+	"""Exponential backoff with full jitter."""
+	return random.uniform(0, min(cap, base * 2**attempt))
+
+
 class SPAPI:
 	"""Base Amazon SP-API class"""
 
@@ -231,8 +359,14 @@ class SPAPI:
 		self.aws_secret_key = aws_secret_key
 		self.country_code = country_code
 		self.region, self.endpoint, self.marketplace_id = Util.get_marketplace_data(country_code)
+		# rate limit (requests per second) of last operation as reported by SP-API.
+		self.rate_limit = None
+
+	def get_access_token(self, use_cache: bool = True) -> str:
+		cache_key = CredentialCache.make_key("lwa", self.client_id, self.client_secret, self.refresh_token)
+		if use_cache and (access_token := credential_cache.get(cache_key)):
+			return access_token
 
-	def get_access_token(self) -> str:
 		data = {
 			"grant_type": "refresh_token",
 			"client_id": self.client_id,
@@ -243,31 +377,38 @@ class SPAPI:
 		response = request(method="POST", url=self.AUTH_URL, data=data)
 		result = response.json()
 		if response.status_code == 200:
-			return result.get("access_token")
+			access_token = result.get("access_token")
+			expires_at = time.time() + int(result.get("expires_in") or 3600)
+			credential_cache.set(cache_key, access_token, expires_at)
+			return access_token
 		exception = SPAPIError(error=result.get("error"), error_description=result.get("error_description"))
 		raise exception
 
-	def get_auth(self) -> AWSSigV4:
+	def get_auth(self, use_cache: bool = True) -> AWSSigV4:
+		cache_key = CredentialCache.make_key(
+			"sts", self.aws_access_key, self.aws_secret_key, self.iam_arn, self.region
+		)
+		credentials = use_cache and credential_cache.get(cache_key)
+
 		try:
-			client = boto3.client(
-				"sts",
-				aws_access_key_id=self.aws_access_key,
-				aws_secret_access_key=self.aws_secret_key,
-				region_name=self.region,
-			)
+			if not credentials:
+				client = boto3.client(
+					"sts",
+					aws_access_key_id=self.aws_access_key,
+					aws_secret_access_key=self.aws_secret_key,
+					region_name=self.region,
+				)
 
-			response = client.assume_role(RoleArn=self.iam_arn, RoleSessionName="SellingPartnerAPI")
+				response = client.assume_role(RoleArn=self.iam_arn, RoleSessionName="SellingPartnerAPI")
 
-			credentials = response["Credentials"]
-			access_key_id = credentials["AccessKeyId"]
-			secret_access_key = credentials["SecretAccessKey"]
-			session_token = credentials["SessionToken"]
+				credentials = response["Credentials"]
+				credential_cache.set(cache_key, credentials, credentials["Expiration"].timestamp())
 
 			return AWSSigV4(
 				service="execute-api",
-				aws_access_key_id=access_key_id,
-				aws_secret_access_key=secret_access_key,
-				aws_session_token=session_token,
+				aws_access_key_id=credentials["AccessKeyId"],
+				aws_secret_access_key=credentials["SecretAccessKey"],
+				aws_session_token=credentials["SessionToken"],
 				region=self.region,
 			)
 		except Exception as e:
@@ -298,6 +439,15 @@ class SPAPI:
 			headers=self.get_headers(),
 			auth=self.get_auth(),
 		)
+		self.rate_limit = Util.parse_rate_limit(response.headers.get("x-amzn-RateLimit-Limit"))
+
+		if response.status_code == 429:
+			raise SPAPIThrottledError(
+				error="QuotaExceeded",
+				error_description=response.text,
+				rate_limit=self.rate_limit,
+			)
+
 		return response.json()
 
 	def list_to_dict(self, key: str, values: list, data: dict) -> None:
@@ -419,6 +569,13 @@ class Util:
 
 		return region, endpoint, marketplace_id
 
+	@staticmethod
+	def parse_rate_limit(value: str | None) -> float | None:
+		try:
+			return float(value) if value else None
+		except ValueError:
+			return None
+
 	@staticmethod
 	def remove_empty(dict):
 		"""
@@ -24,7 +24,10 @@ from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_sp_api
 	Finances,
 	Orders,
 	SPAPIError,
+	TokenBucket,
 	Util,
+	credential_cache,
+	get_backoff_delay,
 )
 from ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_sp_api_settings import (
 	setup_custom_fields,
@@ -294,3 +297,40 @@ class TestAmazon(IntegrationTestCase):
 		)
 
 		self.assertRaises(ValidationError, validate_amazon_sp_api_credentials, **credentials)
+
+	@responses.activate
+	def test_access_token_is_cached(self):
+		credential_cache.clear()
+		responses.add(
+			responses.POST,
+			SPAPI.AUTH_URL,
+			status=200,
+			json={"access_token": "ACCESS_TOKEN", "expires_in": 3600},
+		)
+
+		orders = Orders(**TestAmazonRepository().instance_params)
+		finances = Finances(**TestAmazonRepository().instance_params)
+		hits = credential_cache.hits
+
+		self.assertEqual(orders.get_access_token(), "ACCESS_TOKEN")
+		self.assertEqual(finances.get_access_token(), "ACCESS_TOKEN")
+
+		self.assertEqual(len(responses.calls), 1)
+		self.assertEqual(credential_cache.hits, hits + 1)
+
+	def test_token_bucket(self):
+		bucket = TokenBucket(rate=1000, burst=2)
+		bucket.acquire()
+		bucket.acquire()
+		self.assertLess(bucket.tokens, 1)
+
+		bucket.update_rate(5)
+		self.assertEqual(bucket.rate, 5)
+		bucket.update_rate(None)
+		self.assertEqual(bucket.rate, 5)
+
+		bucket.drain()
+		self.assertEqual(bucket.tokens, 0)
+
+		for attempt in range(10):
+			self.assertLessEqual(get_backoff_delay(attempt, base=1, cap=60), 60)
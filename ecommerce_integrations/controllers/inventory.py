@@ -1,10 +1,38 @@
+import time
+from collections.abc import Iterable, Iterator
+
 import frappe
 from frappe import _dict
 from frappe.query_builder import DocType
 from frappe.query_builder.functions import Max, Sum
-from frappe.utils import now
+from frappe.utils import cint, create_batch, now
 from frappe.utils.nestedset import get_descendants_of
 
+# Ecommerce Items updated in a single UPDATE query by `bulk_update_inventory_sync_status`.
+SYNC_STATUS_UPDATE_BATCH_SIZE = 1000
+# Default number of rows fetched at once by `get_inventory_level_pages`.
+INVENTORY_PAGE_SIZE = 1000
+
+# (ecom_item, warehouse) of last row of a page, next page starts after it.
+InventoryCursor = tuple[str, str]
+
+# redis set per integration of "item_code<sep>warehouse" with stock changes not pushed yet.
+DIRTY_INVENTORY_CACHE_KEY = "ecommerce_dirty_inventory"
+INVENTORY_KEY_SEPARATOR = "\x00"
+# time of last full inventory sync of an integration, see `needs_full_inventory_sync`.
+FULL_INVENTORY_SYNC_CACHE_KEY = "ecommerce_last_full_inventory_sync"
+# changes missed by doc events (e.g. direct DB updates) are picked up by full sync.
+FULL_INVENTORY_SYNC_INTERVAL = 6 * 60 * 60  # seconds
+
+# redis hash per integration of "ecom_item<sep>location" -> "quantity<sep>unix time" of last
+# quantity pushed successfully.
+PUSHED_INVENTORY_CACHE_KEY = "ecommerce_pushed_inventory"
+# quantities are pushed again once their entry expires, in case they were changed on integration's end.
+PUSHED_INVENTORY_EXPIRY = 24 * 60 * 60  # seconds
+
+# (ecom_item, location) of inventory level on integration.
+InventoryLocation = tuple[str, str]
+
 
 def get_inventory_levels(warehouses: tuple[str], integration: str) -> list[_dict]:
 	"""
@@ -42,6 +70,72 @@ def get_inventory_levels(warehouses: tuple[str], integration: str) -> list[_dict
 	return query.run(as_dict=1)
 
 
+def get_inventory_level_pages(
+	warehouses: tuple[str],
+	integration: str,
+	page_size: int = INVENTORY_PAGE_SIZE,
+	after: InventoryCursor | None = None,
+	item_codes: Iterable[str] | None = None,
+) -> Iterator[list[_dict]]:
+	"""Same as `get_inventory_levels` but yields the changed inventory levels in pages of `page_size`.
+
+	Pages are ordered by (ecom_item, warehouse) and each page is fetched after the last row of
+	previous one (or `after`), so only a page is held in memory and rows aren't skipped or repeated
+	when earlier rows are marked as synced while iterating.
+
+	If `item_codes` are specified (e.g. from `pop_dirty_inventory`), inventory levels of only those
+	items are returned irrespective of their last sync time.
+
+	yields: list of _dict containing ecom_item, item_code, integration_item_code, variant_id, inventory_item_id, warehouse, actual_qty, reserved_qty
+	"""
+	EcommerceItem = DocType("Ecommerce Item")
+	Bin = DocType("Bin")
+
+	base_query = (
+		frappe.qb.from_(EcommerceItem)
+		.join(Bin)
+		.on(EcommerceItem.erpnext_item_code == Bin.item_code)
+		.select(
+			EcommerceItem.name.as_("ecom_item"),
+			Bin.item_code.as_("item_code"),
+			EcommerceItem.integration_item_code,
+			EcommerceItem.variant_id,
+			EcommerceItem.inventory_item_id,
+			Bin.warehouse,
+			Bin.actual_qty,
+			Bin.reserved_qty,
+		)
+		.where((Bin.warehouse.isin(warehouses)) & (EcommerceItem.integration == integration))
+		.where(
+			Bin.item_code.isin(list(item_codes))
+			if item_codes is not None
+			else Bin.modified > EcommerceItem.inventory_synced_on
+		)
+		.orderby(EcommerceItem.name)
+		.orderby(Bin.warehouse)
+		.limit(page_size)
+	)
+
+	while True:
+		query = base_query
+		if after:
+			ecom_item, warehouse = after
+			query = query.where(
+				(EcommerceItem.name > ecom_item)
+				| ((EcommerceItem.name == ecom_item) & (Bin.warehouse > warehouse))
+			)
+
+		page = query.run(as_dict=1)
+		if not page:
+			return
+
+		yield page
+
+		if len(page) < page_size:
+			return
+		after = (page[-1].ecom_item, page[-1].warehouse)
+
+
 def get_inventory_levels_of_group_warehouse(warehouse: str, integration: str):
 	"""Get updated inventory for a single group warehouse.
 
@@ -82,6 +176,66 @@ def get_inventory_levels_of_group_warehouse(warehouse: str, integration: str):
 	return data
 
 
+def get_inventory_level_pages_of_group_warehouse(
+	warehouse: str,
+	integration: str,
+	page_size: int = INVENTORY_PAGE_SIZE,
+	after: InventoryCursor | None = None,
+	item_codes: Iterable[str] | None = None,
+) -> Iterator[list[_dict]]:
+	"""Same as `get_inventory_levels_of_group_warehouse` but yields pages of `page_size`.
+
+	Inventory is consolidated per Ecommerce Item, pages are ordered by ecom_item and fetched after
+	the last item of previous page (or `after`), see `get_inventory_level_pages`."""
+
+	child_warehouse = get_descendants_of("Warehouse", warehouse)
+	all_warehouses = (*tuple(child_warehouse), warehouse)
+
+	EcommerceItem = DocType("Ecommerce Item")
+	Bin = DocType("Bin")
+
+	base_query = (
+		frappe.qb.from_(EcommerceItem)
+		.join(Bin)
+		.on(EcommerceItem.erpnext_item_code == Bin.item_code)
+		.select(
+			EcommerceItem.name.as_("ecom_item"),
+			EcommerceItem.erpnext_item_code.as_("item_code"),
+			EcommerceItem.integration_item_code,
+			EcommerceItem.variant_id,
+			Sum(Bin.actual_qty).as_("actual_qty"),
+			Sum(Bin.reserved_qty).as_("reserved_qty"),
+		)
+		.where((Bin.warehouse.isin(all_warehouses)) & (EcommerceItem.integration == integration))
+		.groupby(EcommerceItem.name)
+		.orderby(EcommerceItem.name)
+		.limit(page_size)
+	)
+	if item_codes is not None:
+		base_query = base_query.where(Bin.item_code.isin(list(item_codes)))
+	else:
+		base_query = base_query.having(Max(Bin.modified) > Max(EcommerceItem.inventory_synced_on))
+
+	while True:
+		query = base_query
+		if after:
+			query = query.where(EcommerceItem.name > after[0])
+
+		page = query.run(as_dict=1)
+		if not page:
+			return
+
+		# add warehouse as group warehouse for sending to integrations
+		for item in page:
+			item.warehouse = warehouse
+
+		yield page
+
+		if len(page) < page_size:
+			return
+		after = (page[-1].ecom_item, warehouse)
+
+
 def update_inventory_sync_status(ecommerce_item, time=None):
 	"""Update `inventory_synced_on` timestamp to specified time or current time (if not specified).
 
@@ -91,3 +245,137 @@ def update_inventory_sync_status(ecommerce_item, time=None):
 		time = now()
 
 	frappe.db.set_value("Ecommerce Item", ecommerce_item, "inventory_synced_on", time)
+
+
+def bulk_update_inventory_sync_status(ecommerce_items: Iterable[str], time=None) -> None:
+	"""Update `inventory_synced_on` of multiple Ecommerce Items, see `update_inventory_sync_status`.
+
+	Items are updated in chunks of `SYNC_STATUS_UPDATE_BATCH_SIZE` using one query per chunk."""
+	if time is None:
+		time = now()
+
+	EcommerceItem = DocType("Ecommerce Item")
+	for batch in create_batch(sorted(set(ecommerce_items)), SYNC_STATUS_UPDATE_BATCH_SIZE):
+		(
+			frappe.qb.update(EcommerceItem)
+			.set(EcommerceItem.inventory_synced_on, time)
+			.set(EcommerceItem.modified, now())
+			.set(EcommerceItem.modified_by, frappe.session.user)
+			.where(EcommerceItem.name.isin(batch))
+		).run()
+
+
+def get_stock_changes(doc) -> set[tuple[str, str]]:
+	"""Get (item_code, warehouse) of stock affected by a Bin, Stock Ledger Entry or transaction."""
+	if doc.doctype in ("Bin", "Stock Ledger Entry"):
+		return {(doc.item_code, doc.warehouse)}
+
+	return {
+		(d.item_code, d.warehouse)
+		for d in doc.get("items") or []
+		if d.get("item_code") and d.get("warehouse")
+	}
+
+
+def mark_inventory_dirty(integration: str, changes: Iterable[tuple[str, str]], on_commit=True) -> None:
+	"""Add (item_code, warehouse) pairs to dirty inventory of integration.
+
+	By default pairs are added only after current transaction is committed, so that inventory
+	sync doesn't read stock levels before they are updated."""
+	members = [INVENTORY_KEY_SEPARATOR.join(change) for change in changes]
+	if not members:
+		return
+
+	def add():
+		frappe.cache.sadd(_get_dirty_inventory_key(integration), *members)
+
+	if on_commit:
+		frappe.db.after_commit.add(add)
+	else:
+		add()
+
+
+def pop_dirty_inventory(integration: str) -> set[tuple[str, str]]:
+	"""Atomically get and clear dirty inventory of integration.
+
+	Pairs of items which fail to sync should be added back using `mark_inventory_dirty`."""
+	key = frappe.cache.make_key(_get_dirty_inventory_key(integration))
+
+	pipeline = frappe.cache.pipeline()
+	pipeline.smembers(key)
+	pipeline.delete(key)
+	members, _ = pipeline.execute()
+
+	return {tuple(frappe.safe_decode(m).split(INVENTORY_KEY_SEPARATOR, 1)) for m in members}
+
+
+def needs_full_inventory_sync(integration: str) -> bool:
+	"""Check if changed stock should be found by scanning all Bins instead of dirty inventory.
+
+	Runs periodically as a safety net and when no full sync is known, e.g. redis was flushed."""
+	last_full_sync = frappe.cache.get_value(_get_full_sync_key(integration))
+	return not last_full_sync or time.time() - last_full_sync > FULL_INVENTORY_SYNC_INTERVAL
+
+
+def set_full_inventory_synced(integration: str) -> None:
+	frappe.cache.set_value(_get_full_sync_key(integration), time.time())
+
+
+def _get_dirty_inventory_key(integration: str) -> str:
+	return f"{DIRTY_INVENTORY_CACHE_KEY}:{integration}"
+
+
+def _get_full_sync_key(integration: str) -> str:
+	return f"{FULL_INVENTORY_SYNC_CACHE_KEY}:{integration}"
+
+
+def get_pushed_quantities(
+	integration: str, locations: Iterable[InventoryLocation]
+) -> dict[InventoryLocation, int]:
+	"""Get last quantities successfully pushed to integration in last `PUSHED_INVENTORY_EXPIRY` seconds,
+	missing locations and older entries are skipped.
+
+	Inventory levels whose quantity matches the last pushed quantity can be skipped by sync jobs."""
+	locations = list(locations)
+	if not locations:
+		return {}
+
+	fields = [INVENTORY_KEY_SEPARATOR.join(location) for location in locations]
+	values = frappe.cache.hmget(_get_pushed_inventory_key(integration), fields)
+	expired_before = time.time() - PUSHED_INVENTORY_EXPIRY
+
+	pushed = {}
+	for location, value in zip(locations, values, strict=True):
+		if value is None:
+			continue
+		qty, pushed_at = frappe.safe_decode(value).split(INVENTORY_KEY_SEPARATOR)
+		if float(pushed_at) >= expired_before:
+			pushed[location] = cint(qty)
+
+	return pushed
+
+
+def record_pushed_quantities(
+	integration: str, quantities: dict[InventoryLocation, int], pushed_at: float | None = None
+) -> None:
+	"""Save quantities successfully pushed to integration, see `get_pushed_quantities`."""
+	if not quantities:
+		return
+
+	pushed_at = pushed_at or time.time()
+	key = _get_pushed_inventory_key(integration)
+	pipeline = frappe.cache.pipeline()
+	pipeline.hset(
+		key,
+		mapping={
+			INVENTORY_KEY_SEPARATOR.join(location): f"{cint(qty)}{INVENTORY_KEY_SEPARATOR}{pushed_at}"
+			for location, qty in quantities.items()
+		},
+	)
+	# entries expire individually, hash of an integration which isn't synced anymore is removed.
+	pipeline.expire(key, PUSHED_INVENTORY_EXPIRY)
+	pipeline.execute()
+
+
+def _get_pushed_inventory_key(integration: str) -> str:
+	return frappe.cache.make_key(f"{PUSHED_INVENTORY_CACHE_KEY}:{integration}")
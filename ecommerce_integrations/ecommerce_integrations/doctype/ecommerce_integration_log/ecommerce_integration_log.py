@@ -1,18 +1,77 @@
 # Copyright (c) 2021, Frappe and contributors
 # For license information, please see LICENSE
 
+import base64
 import json
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from math import ceil
 
 import frappe
 from frappe import _
 from frappe.model.document import Document
+from frappe.model.naming import set_new_name
 from frappe.query_builder import Interval
 from frappe.query_builder.functions import Now
-from frappe.utils import strip_html
+from frappe.utils import cint, flt, now, strip_html
 from frappe.utils.data import cstr
 
+# logs with these statuses are always written immediately, even inside `buffered_logs`.
+ERROR_LOG_STATUSES = ("Error", "Failure", "Failed")
+# compressed payloads are stored as base64 of zlib compressed minified JSON with this prefix.
+COMPRESSED_PAYLOAD_PREFIX = "zlib:"
+# smaller payloads are stored as is.
+MIN_COMPRESSED_PAYLOAD_SIZE = 1024
+PAYLOAD_FIELDS = ("request_data", "response_data")
+COMPRESS_LOGS_CHUNK_SIZE = 500
+
+# retention in days of logs other than "Success" logs whose retention is set in Log Settings,
+# can be overridden using `integration_log_retention` in site config. 0 keeps the logs forever.
+LOG_RETENTION_DAYS = {"Error": 365, "Invalid": 30}
+# logs deleted in one query and pause in seconds between queries so that concurrent syncs can log.
+LOG_CLEANUP_CHUNK_SIZE = 1000
+LOG_CLEANUP_PAUSE = 0.5
+# cleanup stops after this many seconds and resumes from same position in next run.
+LOG_CLEANUP_MAX_RUNTIME = 15 * 60
+LOG_CLEANUP_CURSOR_CACHE_KEY = "ecommerce_integration_log_cleanup_cursor"
+
+# logs retried together are split between these many background jobs.
+BULK_RETRY_WORKERS = 4
+# timeout of a bulk retry job per log in it, in seconds.
+BULK_RETRY_TIMEOUT_PER_LOG = 30
+# retried logs after which progress is published.
+BULK_RETRY_PROGRESS_INTERVAL = 20
+BULK_RETRY_PROGRESS_EVENT = "ecommerce_integration_log_retry_progress"
+
+# number of buffered logs after which they are written to database.
+LOG_BUFFER_SIZE = 100
+# columns written while inserting buffered logs in bulk.
+BUFFERED_LOG_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"integration",
+	"title",
+	"status",
+	"method",
+	"message",
+	"traceback",
+	"request_data",
+	"response_data",
+)
+
 
 class EcommerceIntegrationLog(Document):
+	def onload(self):
+		# compressed payloads are decoded only when log is opened.
+		for field in PAYLOAD_FIELDS:
+			self.set(field, decode_payload(self.get(field)))
+
 	def validate(self):
 		self._set_title()
 
@@ -31,10 +90,7 @@ class EcommerceIntegrationLog(Document):
 
 	@staticmethod
 	def clear_old_logs(days=90):
-		table = frappe.qb.DocType("Ecommerce Integration Log")
-		frappe.db.delete(
-			table, filters=(table.modified < (Now() - Interval(days=days))) & (table.status == "Success")
-		)
+		delete_old_logs(days)
 
 
 def create_log(
@@ -50,6 +106,26 @@ def create_log(
 ):
 	make_new = make_new or not bool(frappe.flags.request_id)
 
+	details = {
+		"status": status,
+		"message": message or _get_message(exception),
+		"method": method,
+		"response_data": _serialize(response_data),
+		"request_data": _serialize(request_data),
+		"traceback": frappe.get_traceback(),
+	}
+
+	buffer: LogBuffer | None = getattr(frappe.local, "integration_log_buffer", None)
+	if buffer is not None:
+		if status not in ERROR_LOG_STATUSES and not rollback:
+			return buffer.add(module_def, make_new, details)
+
+		# errors are written immediately along with logs buffered before them.
+		if rollback:
+			frappe.db.rollback()
+			rollback = False
+		buffer.flush()
+
 	if rollback:
 		frappe.db.rollback()
 
@@ -59,18 +135,7 @@ def create_log(
 	else:
 		log = frappe.get_doc("Ecommerce Integration Log", frappe.flags.request_id)
 
-	if response_data and not isinstance(response_data, str):
-		response_data = json.dumps(response_data, sort_keys=True, indent=4)
-
-	if request_data and not isinstance(request_data, str):
-		request_data = json.dumps(request_data, sort_keys=True, indent=4)
-
-	log.message = message or _get_message(exception)
-	log.method = log.method or method
-	log.response_data = response_data or log.response_data
-	log.request_data = request_data or log.request_data
-	log.traceback = log.traceback or frappe.get_traceback()
-	log.status = status
+	_set_log_details(log, details)
 	log.save(ignore_permissions=True)
 
 	frappe.db.commit()
@@ -78,6 +143,184 @@ def create_log(
 	return log
 
 
+@contextmanager
+def buffered_logs(size: int = LOG_BUFFER_SIZE):
+	"""Buffer logs created inside the block and write them together.
+
+	Logs are written in bulk when `size` logs are buffered and when the block exits. Error
+	logs are written immediately along with all logs buffered till then. Use this in jobs which
+	create many logs, e.g. syncing orders in a loop, so that every log doesn't need a commit.
+
+	Buffered logs are not in database yet, so they can't be passed to background jobs. Logs don't
+	commit the transaction till they are flushed, so work which shouldn't be lost on rollback of
+	a later error log should be committed explicitly. If an exception escapes the block, the open
+	transaction is rolled back before buffered logs are written."""
+	if getattr(frappe.local, "integration_log_buffer", None) is not None:
+		# nested block, outer block writes the logs.
+		yield
+		return
+
+	buffer = frappe.local.integration_log_buffer = LogBuffer(size)
+	try:
+		yield
+	except BaseException:
+		frappe.db.rollback()
+		raise
+	finally:
+		frappe.local.integration_log_buffer = None
+		buffer.flush()
+
+
+class LogBuffer:
+	"""Logs kept in memory by `create_log` till they are written by `flush`."""
+
+	def __init__(self, size: int = LOG_BUFFER_SIZE):
+		self.size = size
+		self.new_logs: dict[str, Document] = {}
+		# details of existing logs which are applied in same order when flushed.
+		self.updates: dict[str, list[dict]] = {}
+
+	def __len__(self):
+		return len(self.new_logs) + len(self.updates)
+
+	def add(self, module_def, make_new: bool, details: dict) -> Document | frappe._dict:
+		request_id = frappe.flags.request_id
+
+		if make_new:
+			log = frappe.new_doc("Ecommerce Integration Log")
+			log.integration = cstr(module_def)
+			log.creation = log.modified = now()
+			log.owner = log.modified_by = frappe.session.user
+			set_new_name(log)
+			self.new_logs[log.name] = log
+		elif request_id in self.new_logs:
+			log = self.new_logs[request_id]
+		else:
+			self.updates.setdefault(request_id, []).append(details)
+			log = frappe._dict(name=request_id, **details)
+
+		if isinstance(log, Document):
+			_set_log_details(log, details)
+			log.modified = now()
+
+		if len(self) >= self.size:
+			self.flush()
+
+		return log
+
+	def flush(self) -> None:
+		"""Insert new logs in bulk and update existing logs, then commit."""
+		if not len(self):
+			return
+
+		values = []
+		for log in self.new_logs.values():
+			log._set_title()
+			values.append([log.get(field) for field in BUFFERED_LOG_FIELDS])
+
+		if values:
+			frappe.db.bulk_insert("Ecommerce Integration Log", BUFFERED_LOG_FIELDS, values)
+
+		for name, updates in self.updates.items():
+			log = frappe.get_doc("Ecommerce Integration Log", name)
+			for details in updates:
+				_set_log_details(log, details)
+			log.save(ignore_permissions=True)
+
+		self.new_logs.clear()
+		self.updates.clear()
+		frappe.db.commit()
+
+
+def _set_log_details(log, details: dict) -> None:
+	log.message = details["message"]
+	log.method = log.method or details["method"]
+	log.response_data = details["response_data"] or log.response_data
+	log.request_data = details["request_data"] or log.request_data
+	log.traceback = log.traceback or details["traceback"]
+	log.status = details["status"]
+
+
+def _serialize(data):
+	if data and should_compress_logs():
+		return compress_payload(data)
+
+	if data and not isinstance(data, str):
+		return json.dumps(data, sort_keys=True, indent=4)
+	return data
+
+
+def should_compress_logs() -> bool:
+	"""Payloads are compressed if `compress_integration_logs` is set in site config."""
+	return bool(frappe.conf.get("compress_integration_logs"))
+
+
+def compress_payload(data) -> str:
+	"""Get minified and compressed payload for storing in log, see `decode_payload`.
+
+	Small payloads and payloads which don't get smaller are stored as indented JSON or text."""
+	original = data if isinstance(data, str) else json.dumps(data, sort_keys=True, indent=4)
+	if original.startswith(COMPRESSED_PAYLOAD_PREFIX) or len(original) < MIN_COMPRESSED_PAYLOAD_SIZE:
+		return original
+
+	minified = original
+	try:
+		minified = json.dumps(json.loads(original), sort_keys=True, separators=(",", ":"))
+	except ValueError:
+		pass
+
+	compressed = COMPRESSED_PAYLOAD_PREFIX + base64.b64encode(zlib.compress(minified.encode(), 9)).decode()
+	return compressed if len(compressed) < len(original) else original
+
+
+def decode_payload(value: str | None) -> str | None:
+	"""Get payload stored by `compress_payload` as indented JSON or text."""
+	if not value or not value.startswith(COMPRESSED_PAYLOAD_PREFIX):
+		return value
+
+	text = zlib.decompress(base64.b64decode(value[len(COMPRESSED_PAYLOAD_PREFIX) :])).decode()
+	try:
+		return json.dumps(json.loads(text), sort_keys=True, indent=4)
+	except ValueError:
+		return text
+
+
+def compress_logs(chunk_size: int = COMPRESS_LOGS_CHUNK_SIZE) -> int:
+	"""Compress payloads of existing logs, returns number of updated logs.
+
+	Logs are processed in chunks ordered by name and committed after every chunk, so this can be
+	stopped and run again.
+
+	Usage: bench --site <site> execute ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.compress_logs
+	"""
+	Log = frappe.qb.DocType("Ecommerce Integration Log")
+	compressed_count = 0
+	last_name = ""
+
+	while True:
+		logs = (
+			frappe.qb.from_(Log)
+			.select(Log.name, *(Log[field] for field in PAYLOAD_FIELDS))
+			.where(Log.name > last_name)
+			.orderby(Log.name)
+			.limit(chunk_size)
+		).run(as_dict=True)
+		if not logs:
+			break
+
+		for log in logs:
+			compressed = {field: compress_payload(log[field]) for field in PAYLOAD_FIELDS if log[field]}
+			changes = {field: value for field, value in compressed.items() if value != log[field]}
+			if changes:
+				frappe.db.set_value("Ecommerce Integration Log", log.name, changes, update_modified=False)
+				compressed_count += 1
+
+		frappe.db.commit()
+		last_name = logs[-1].name
+
+	return compressed_count
+
+
 def _get_message(exception):
 	if hasattr(exception, "message"):
 		return strip_html(exception.message)
@@ -87,16 +330,94 @@ def _get_message(exception):
 		return _("Something went wrong while syncing")
 
 
+def delete_old_logs(
+	days: int = 90,
+	chunk_size: int | None = None,
+	pause: float | None = None,
+	max_runtime: int | None = None,
+) -> dict:
+	"""Delete Success logs older than `days` and other logs older than their retention period.
+
+	Logs are deleted in chunks ordered by name and committed after every chunk, so locks are
+	held briefly. Position is saved after every chunk and if cleanup is stopped or runs longer
+	than `max_runtime`, next run resumes from there.
+
+	Defaults can be changed from site config using `integration_log_retention` (e.g. {"Error": 180}),
+	`integration_log_cleanup_chunk_size`, `integration_log_cleanup_pause` and
+	`integration_log_cleanup_max_runtime`.
+
+	returns: deleted logs per status, time taken and deleted logs per second.
+	"""
+	conf = frappe.conf
+	chunk_size = chunk_size or cint(conf.get("integration_log_cleanup_chunk_size")) or LOG_CLEANUP_CHUNK_SIZE
+	if pause is None:
+		pause = flt(conf.get("integration_log_cleanup_pause", LOG_CLEANUP_PAUSE))
+	max_runtime = (
+		max_runtime or cint(conf.get("integration_log_cleanup_max_runtime")) or LOG_CLEANUP_MAX_RUNTIME
+	)
+	retention = {"Success": days, **LOG_RETENTION_DAYS, **(conf.get("integration_log_retention") or {})}
+
+	Log = frappe.qb.DocType("Ecommerce Integration Log")
+	cursors = frappe.cache.get_value(LOG_CLEANUP_CURSOR_CACHE_KEY) or {}
+	deleted = Counter()
+	started = time.monotonic()
+
+	for status, retention_days in retention.items():
+		if not cint(retention_days):
+			continue
+
+		while time.monotonic() - started < max_runtime:
+			names = (
+				frappe.qb.from_(Log)
+				.select(Log.name)
+				.where(Log.status == status)
+				.where(Log.modified < (Now() - Interval(days=cint(retention_days))))
+				.where(Log.name > cursors.get(status, ""))
+				.orderby(Log.name)
+				.limit(chunk_size)
+			).run(pluck=True)
+
+			if names:
+				frappe.db.delete("Ecommerce Integration Log", {"name": ("in", names)})
+				frappe.db.commit()
+				deleted[status] += len(names)
+
+			if len(names) < chunk_size:
+				# reached the end, next run starts from beginning.
+				cursors.pop(status, None)
+				frappe.cache.set_value(LOG_CLEANUP_CURSOR_CACHE_KEY, cursors)
+				break
+
+			cursors[status] = names[-1]
+			frappe.cache.set_value(LOG_CLEANUP_CURSOR_CACHE_KEY, cursors)
+			time.sleep(pause)
+
+	elapsed = time.monotonic() - started
+	stats = {
+		"deleted": dict(deleted),
+		"seconds": round(elapsed, 2),
+		"rows_per_second": round(sum(deleted.values()) / elapsed, 2) if elapsed else 0,
+		"completed": not cursors,
+	}
+	frappe.logger("ecommerce_integrations").info(f"Ecommerce Integration Log cleanup: {stats}")
+
+	return stats
+
+
 @frappe.whitelist()
-def resync(method, name, request_data):
+def resync(method, name, request_data=None):
 	_retry_job(name)
 
 
 def _retry_job(job: str):
 	frappe.only_for("System Manager")
 
+	_restore_archived_logs([job])
+	if not frappe.db.exists("Ecommerce Integration Log", job):
+		return
+
 	doc = frappe.get_doc("Ecommerce Integration Log", job)
-	if not doc.method.startswith("ecommerce_integrations.") or doc.status != "Error":
+	if not _is_retryable_method(doc.method) or doc.status != "Error":
 		return
 
 	doc.db_set("status", "Queued", update_modified=False)
@@ -107,15 +428,121 @@ def _retry_job(job: str):
 		queue="short",
 		timeout=300,
 		is_async=True,
-		payload=json.loads(doc.request_data),
+		payload=json.loads(decode_payload(doc.request_data)),
 		request_id=doc.name,
 		enqueue_after_commit=True,
 	)
 
 
+def _is_retryable_method(method: str | None) -> bool:
+	return bool(method) and method.startswith("ecommerce_integrations.")
+
+
+def _restore_archived_logs(names: list[str]) -> None:
+	"""Move archived logs which can be retried back to log table, others are left in archive."""
+	from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log_archive.ecommerce_integration_log_archive import (
+		restore_archived_log,
+	)
+
+	archived = frappe.get_all(
+		"Ecommerce Integration Log Archive",
+		filters={"name": ("in", names), "status": "Error", "method": ("like", "ecommerce_integrations.%")},
+		pluck="name",
+	)
+	for name in archived:
+		restore_archived_log(name)
+
+
 @frappe.whitelist()
 def bulk_retry(names):
+	"""Mark failed logs as Queued and retry them in a few background jobs, see `retry_logs`."""
+	frappe.only_for("System Manager")
+
 	if isinstance(names, str):
 		names = json.loads(names)
-	for name in names:
-		_retry_job(name)
+	if not names:
+		return
+
+	_restore_archived_logs(names)
+
+	Log = frappe.qb.DocType("Ecommerce Integration Log")
+	names = (
+		frappe.qb.from_(Log)
+		.select(Log.name)
+		.where(Log.name.isin(names))
+		.where(Log.status == "Error")
+		.where(Log.method.like("ecommerce_integrations.%"))
+		.orderby(Log.name)
+	).run(pluck=True)
+	if not names:
+		return
+
+	frappe.qb.update(Log).set(Log.status, "Queued").set(Log.traceback, "").where(Log.name.isin(names)).run()
+
+	batch_id = frappe.generate_hash(length=10)
+	slice_size = ceil(len(names) / BULK_RETRY_WORKERS)
+	for start in range(0, len(names), slice_size):
+		log_names = names[start : start + slice_size]
+		frappe.enqueue(
+			"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.retry_logs",
+			queue="long",
+			timeout=len(log_names) * BULK_RETRY_TIMEOUT_PER_LOG,
+			names=log_names,
+			batch_id=batch_id,
+			total=len(names),
+			user=frappe.session.user,
+			enqueue_after_commit=True,
+		)
+
+	return {"batch_id": batch_id, "total": len(names)}
+
+
+def retry_logs(names: list[str], batch_id: str, total: int, user: str | None = None) -> None:
+	"""Retry queued logs one after another in a single job.
+
+	Every log is committed after it is retried and rolled back on an unhandled error, so the error
+	is recorded on its log without affecting others. Settings and documents cached while retrying
+	the first log are reused by the rest. Progress of the whole batch is published to `user`."""
+	Log = frappe.qb.DocType("Ecommerce Integration Log")
+	logs = (
+		frappe.qb.from_(Log)
+		.select(Log.name, Log.method, Log.request_data)
+		.where(Log.name.isin(names))
+		.where(Log.status == "Queued")
+		.orderby(Log.name)
+	).run(as_dict=True)
+
+	retried = 0
+	for log in logs:
+		frappe.flags.request_id = log.name
+		try:
+			method = frappe.get_attr(log.method)
+			method(payload=json.loads(decode_payload(log.request_data)), request_id=log.name)
+		except Exception as e:
+			# retried methods commit and rollback on their own, savepoints don't survive them.
+			frappe.db.rollback()
+			create_log(status="Error", exception=e)
+		finally:
+			frappe.flags.request_id = None
+		frappe.db.commit()
+
+		retried += 1
+		if retried == BULK_RETRY_PROGRESS_INTERVAL:
+			_publish_retry_progress(batch_id, retried, total, user)
+			retried = 0
+
+	# logs which were not queued anymore are counted as done.
+	_publish_retry_progress(batch_id, retried + len(names) - len(logs), total, user)
+
+
+def _publish_retry_progress(batch_id: str, retried: int, total: int, user: str | None) -> None:
+	# progress is counted in redis as logs of a batch are retried by multiple jobs.
+	key = frappe.cache.make_key(f"{BULK_RETRY_PROGRESS_EVENT}:{batch_id}")
+	processed = frappe.cache.incrby(key, retried)
+	frappe.cache.expire(key, 24 * 60 * 60)
+
+	frappe.publish_realtime(
+		BULK_RETRY_PROGRESS_EVENT,
+		{"batch_id": batch_id, "processed": processed, "total": total, "done": processed >= total},
+		user=user,
+	)
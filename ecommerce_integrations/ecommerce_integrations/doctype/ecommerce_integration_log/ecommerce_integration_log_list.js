@@ -17,5 +17,19 @@ frappe.listview_settings["Ecommerce Integration Log"] = {
 				"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.bulk_retry",
 			);
 		});
+
+		frappe.realtime.on(
+			"ecommerce_integration_log_retry_progress",
+			({ processed, total, done }) => {
+				frappe.show_progress(
+					__("Retrying"),
+					processed,
+					total,
+					__("{0} of {1} logs retried", [processed, total]),
+					true,
+				);
+				if (done) listview.refresh();
+			},
+		);
 	},
 };
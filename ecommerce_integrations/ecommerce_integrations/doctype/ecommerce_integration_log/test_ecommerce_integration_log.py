@@ -1,9 +1,143 @@
 # Copyright (c) 2021, Frappe and Contributors
 # See LICENSE
 
-# import frappe
+import json
+from unittest.mock import patch
+
+import frappe
 from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days, now_datetime
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	COMPRESSED_PAYLOAD_PREFIX,
+	buffered_logs,
+	bulk_retry,
+	compress_payload,
+	create_log,
+	decode_payload,
+	delete_old_logs,
+	retry_logs,
+)
+
+TEST_MODULE = "ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.test_ecommerce_integration_log"
+
+
+def _retry_succeeds(payload, request_id=None):
+	create_log(status="Success", message=f"synced {payload['id']}")
+
+
+def _retry_fails(payload, request_id=None):
+	frappe.db.set_value("Ecommerce Integration Log", request_id, "message", "partially synced")
+	raise frappe.ValidationError("sync failed")
 
 
 class TestEcommerceIntegrationLog(IntegrationTestCase):
-	pass
+	def tearDown(self):
+		frappe.flags.request_id = None
+
+	def test_buffered_logs(self):
+		"""requirement: logs are written together at the end of block, errors are written immediately"""
+		with buffered_logs():
+			log = create_log(module_def="shopify", method="test_buffered_logs", make_new=True)
+			frappe.flags.request_id = log.name
+			create_log(module_def="shopify", status="Success", message="synced")
+			self.assertFalse(frappe.db.exists("Ecommerce Integration Log", log.name))
+
+			error_log = create_log(module_def="shopify", status="Error", message="failed", make_new=True)
+			self.assertTrue(frappe.db.exists("Ecommerce Integration Log", error_log.name))
+			# logs buffered before error are written with it
+			self.assertTrue(frappe.db.exists("Ecommerce Integration Log", log.name))
+
+			frappe.flags.request_id = None
+			success_log = create_log(module_def="shopify", status="Success", make_new=True)
+			self.assertFalse(frappe.db.exists("Ecommerce Integration Log", success_log.name))
+
+		log.reload()
+		self.assertEqual(log.status, "Success")
+		self.assertEqual(log.method, "test_buffered_logs")
+		self.assertEqual(
+			frappe.db.get_value("Ecommerce Integration Log", success_log.name, "status"), "Success"
+		)
+
+	def test_buffered_logs_on_exception(self):
+		"""requirement: unfinished work is rolled back before buffered logs are written"""
+		log = create_log(module_def="shopify", status="Success", make_new=True)
+
+		with self.assertRaises(frappe.ValidationError):
+			with buffered_logs():
+				buffered_log = create_log(module_def="shopify", status="Success", make_new=True)
+				frappe.db.set_value("Ecommerce Integration Log", log.name, "message", "unfinished")
+				raise frappe.ValidationError
+
+		self.assertTrue(frappe.db.exists("Ecommerce Integration Log", buffered_log.name))
+		self.assertNotEqual(
+			frappe.db.get_value("Ecommerce Integration Log", log.name, "message"), "unfinished"
+		)
+
+	def test_compressed_payload(self):
+		"""requirement: large payloads are stored compressed and decoded when log is opened"""
+		payload = {"items": [{"sku": f"SKU-{i}", "qty": i} for i in range(100)]}
+
+		compressed = compress_payload(payload)
+		self.assertTrue(compressed.startswith(COMPRESSED_PAYLOAD_PREFIX))
+		self.assertEqual(json.loads(decode_payload(compressed)), payload)
+
+		self.assertEqual(compress_payload("small"), "small")
+		self.assertEqual(decode_payload("small"), "small")
+
+		log = create_log(module_def="shopify", status="Success", make_new=True)
+		frappe.db.set_value("Ecommerce Integration Log", log.name, "request_data", compressed)
+
+		log = frappe.get_doc("Ecommerce Integration Log", log.name)
+		log.run_method("onload")
+		self.assertEqual(json.loads(log.request_data), payload)
+
+	def test_delete_old_logs(self):
+		"""requirement: old logs are deleted in chunks using retention of their status"""
+		logs = {}
+		for status, age in (("Success", 10), ("Success", 1), ("Error", 10), ("Error", 400), ("Invalid", 40)):
+			log = create_log(module_def="shopify", status=status, make_new=True)
+			frappe.db.set_value(
+				"Ecommerce Integration Log",
+				log.name,
+				"modified",
+				add_days(now_datetime(), -age),
+				update_modified=False,
+			)
+			logs[(status, age)] = log.name
+
+		stats = delete_old_logs(days=5, chunk_size=1, pause=0)
+
+		remaining = {key for key, name in logs.items() if frappe.db.exists("Ecommerce Integration Log", name)}
+		self.assertEqual(remaining, {("Success", 1), ("Error", 10)})
+		self.assertTrue(stats["completed"])
+		self.assertGreaterEqual(stats["deleted"]["Success"], 1)
+		self.assertGreaterEqual(stats["deleted"]["Error"], 1)
+
+	def test_bulk_retry(self):
+		"""requirement: logs are queued together and retried in few jobs with errors isolated per log"""
+		logs = []
+		for i, method in enumerate(("_retry_succeeds", "_retry_fails", "_retry_succeeds")):
+			log = create_log(
+				module_def="shopify",
+				status="Error",
+				method=f"{TEST_MODULE}.{method}",
+				request_data={"id": i},
+				make_new=True,
+			)
+			logs.append(log.name)
+
+		with patch("frappe.enqueue") as enqueue:
+			batch = bulk_retry(json.dumps(logs))
+
+		self.assertEqual(batch["total"], 3)
+		for name in logs:
+			self.assertEqual(frappe.db.get_value("Ecommerce Integration Log", name, "status"), "Queued")
+
+		for call in enqueue.call_args_list:
+			retry_logs(**{k: call.kwargs[k] for k in ("names", "batch_id", "total", "user")})
+
+		statuses = [frappe.db.get_value("Ecommerce Integration Log", name, "status") for name in logs]
+		self.assertEqual(statuses, ["Success", "Error", "Success"])
+		self.assertEqual(frappe.db.get_value("Ecommerce Integration Log", logs[1], "message"), "sync failed")
+		self.assertEqual(frappe.db.get_value("Ecommerce Integration Log", logs[2], "message"), "synced 2")
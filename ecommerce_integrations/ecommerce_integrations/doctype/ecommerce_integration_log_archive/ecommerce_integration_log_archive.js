@@ -0,0 +1,41 @@
+// Copyright (c) 2026, Frappe and contributors
+// For license information, please see LICENSE
+
+frappe.ui.form.on("Ecommerce Integration Log Archive", {
+	refresh: function (frm) {
+		const log = frm.doc.__onload && frm.doc.__onload.log;
+		if (!log) return;
+
+		frm.add_custom_button(__("View Log"), function () {
+			const dialog = new frappe.ui.Dialog({
+				title: log.title || frm.doc.name,
+				size: "large",
+				fields: ["message", "traceback", "request_data", "response_data"].map((fieldname) => ({
+					fieldname: fieldname,
+					fieldtype: "Code",
+					label: frappe.unscrub(fieldname),
+					read_only: 1,
+					default: log[fieldname],
+				})),
+			});
+			dialog.show();
+		});
+
+		if (log.request_data && frm.doc.status == "Error") {
+			frm.add_custom_button(__("Retry"), function () {
+				frappe.call({
+					method: "ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.resync",
+					args: {
+						method: frm.doc.method,
+						name: frm.doc.name,
+						request_data: log.request_data,
+					},
+					callback: function (r) {
+						frappe.msgprint(__("Reattempting to sync"));
+						frappe.set_route("Form", "Ecommerce Integration Log", frm.doc.name);
+					},
+				});
+			}).addClass("btn-primary");
+		}
+	},
+});
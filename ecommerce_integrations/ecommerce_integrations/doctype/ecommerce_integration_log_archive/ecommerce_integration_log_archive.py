@@ -0,0 +1,223 @@
+# Copyright (c) 2026, Frappe and contributors
+# For license information, please see LICENSE
+
+import gzip
+import json
+from datetime import date
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.query_builder.functions import Date, Min
+from frappe.utils import add_days, cint, getdate, now, nowdate
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	PAYLOAD_FIELDS,
+	decode_payload,
+)
+
+# logs read from database in one query.
+ARCHIVE_CHUNK_SIZE = 1000
+# compressed size after which a new file is started for the same date, must be below `max_file_size`.
+MAX_SEGMENT_SIZE = 10 * 1024 * 1024
+# archives are kept forever unless `integration_log_archive_retention_days` is set in site config.
+ARCHIVE_RETENTION_DAYS = 0
+ARCHIVE_INDEX_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"integration",
+	"status",
+	"method",
+	"log_date",
+	"file_offset",
+	"file_length",
+	"file",
+)
+
+
+class EcommerceIntegrationLogArchive(Document):
+	def onload(self):
+		self.set_onload("log", get_archived_log(self.name))
+
+	def on_trash(self):
+		_delete_unreferenced_file(self.file, exclude=self.name)
+
+
+class ArchiveSegment:
+	"""Compressed JSONL file of logs of a date.
+
+	Every line is compressed separately as a gzip member, so the file can still be read with `zcat`
+	and a single log can be read from its offset without decompressing the whole file."""
+
+	def __init__(self, log_date: date):
+		self.log_date = log_date
+		self.content = bytearray()
+		# (name, integration, method, status, offset, length) of logs in segment.
+		self.index: list[tuple] = []
+
+	def add(self, log: dict) -> bool:
+		"""Add log to segment, returns False without adding it if segment would exceed `MAX_SEGMENT_SIZE`."""
+		record = {
+			field: decode_payload(value) if field in PAYLOAD_FIELDS else value for field, value in log.items()
+		}
+		line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+		compressed = gzip.compress(line.encode(), mtime=0)
+		if self.index and len(self.content) + len(compressed) > MAX_SEGMENT_SIZE:
+			return False
+
+		details = (log["name"], log["integration"], log["method"], log["status"])
+		self.index.append((*details, len(self.content), len(compressed)))
+		self.content.extend(compressed)
+		return True
+
+	def save(self, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> int:
+		"""Save segment as a private file, index its logs and delete them from the log table."""
+		if not self.index:
+			return 0
+
+		file = frappe.get_doc(
+			{
+				"doctype": "File",
+				"file_name": f"ecommerce-integration-logs-{self.log_date}.jsonl.gz",
+				"is_private": 1,
+				"content": bytes(self.content),
+			}
+		).insert(ignore_permissions=True)
+
+		timestamp = now()
+		user = frappe.session.user
+		values = [
+			(name, timestamp, timestamp, user, user, 0, *details, self.log_date, offset, length, file.name)
+			for name, *details, offset, length in self.index
+		]
+		frappe.db.bulk_insert("Ecommerce Integration Log Archive", ARCHIVE_INDEX_FIELDS, values)
+
+		names = [row[0] for row in self.index]
+		for start in range(0, len(names), chunk_size):
+			frappe.db.delete("Ecommerce Integration Log", {"name": ("in", names[start : start + chunk_size])})
+
+		frappe.db.commit()
+		return len(names)
+
+
+def archive_logs(days: int | None = None, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> int:
+	"""Move logs not modified in last `days` days to compressed files, returns number of archived logs.
+
+	Logs of every date are written to private files named by the date and indexed in Ecommerce
+	Integration Log Archive. Every file is committed with its index, so this can be stopped and run
+	again. Archival is enabled by setting `integration_log_archive_days` in site config, it should be
+	lower than retention of logs for them to be archived before they are deleted. Archives older
+	than `integration_log_archive_retention_days` are deleted, see `delete_old_archives`.
+
+	Usage: bench --site <site> execute ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log_archive.ecommerce_integration_log_archive.archive_logs --kwargs "{'days': 30}"
+	"""
+	days = days or cint(frappe.conf.get("integration_log_archive_days"))
+	if not days:
+		return 0
+
+	delete_old_archives()
+
+	Log = frappe.qb.DocType("Ecommerce Integration Log")
+	cutoff = getdate(add_days(nowdate(), -days))
+	archived_count = 0
+
+	while True:
+		log_date = (
+			frappe.qb.from_(Log).select(Date(Min(Log.modified))).where(Log.modified < cutoff).run()[0][0]
+		)
+		if not log_date:
+			break
+
+		log_date = getdate(log_date)
+		segment = ArchiveSegment(log_date)
+		last_name = ""
+		while True:
+			logs = (
+				frappe.qb.from_(Log)
+				.select("*")
+				.where(Log.modified >= log_date)
+				.where(Log.modified < add_days(log_date, 1))
+				.where(Log.name > last_name)
+				.orderby(Log.name)
+				.limit(chunk_size)
+			).run(as_dict=True)
+			if not logs:
+				break
+
+			for log in logs:
+				if not segment.add(log):
+					archived_count += segment.save(chunk_size)
+					segment = ArchiveSegment(log_date)
+					segment.add(log)
+			last_name = logs[-1].name
+
+		archived_count += segment.save(chunk_size)
+
+	return archived_count
+
+
+def delete_old_archives(days: int | None = None) -> int:
+	"""Delete archive files of dates older than `days` along with their index, returns number of files.
+
+	Retention is set using `integration_log_archive_retention_days` in site config."""
+	days = days or cint(frappe.conf.get("integration_log_archive_retention_days")) or ARCHIVE_RETENTION_DAYS
+	if not days:
+		return 0
+
+	cutoff = getdate(add_days(nowdate(), -days))
+	files = frappe.get_all(
+		"Ecommerce Integration Log Archive",
+		filters={"log_date": ("<", cutoff)},
+		pluck="file",
+		distinct=True,
+	)
+	for file in files:
+		frappe.db.delete("Ecommerce Integration Log Archive", {"file": file})
+		_delete_unreferenced_file(file)
+		frappe.db.commit()
+
+	return len(files)
+
+
+def _delete_unreferenced_file(file: str | None, exclude: str | None = None) -> None:
+	"""Delete archive file if it has no logs left in the index other than `exclude`."""
+	filters = {"file": file}
+	if exclude:
+		filters["name"] = ("!=", exclude)
+
+	if file and not frappe.db.exists("Ecommerce Integration Log Archive", filters):
+		frappe.delete_doc("File", file, ignore_permissions=True, ignore_missing=True)
+
+
+def get_archived_log(name: str) -> frappe._dict | None:
+	"""Read an archived log from its file using offset saved in the index."""
+	index = frappe.db.get_value(
+		"Ecommerce Integration Log Archive", name, ["file", "file_offset", "file_length"], as_dict=True
+	)
+	if not index:
+		return None
+
+	path = frappe.get_doc("File", index.file).get_full_path()
+	with open(path, "rb") as f:
+		f.seek(index.file_offset)
+		return frappe._dict(json.loads(gzip.decompress(f.read(index.file_length))))
+
+
+def restore_archived_log(name: str) -> Document:
+	"""Move an archived log back to Ecommerce Integration Log, e.g. for retrying it."""
+	record = get_archived_log(name)
+	if not record:
+		frappe.throw(_("Archived log {0} not found").format(name))
+
+	log = frappe.get_doc({**record, "doctype": "Ecommerce Integration Log"})
+	log.db_insert()
+
+	file = frappe.db.get_value("Ecommerce Integration Log Archive", name, "file")
+	frappe.db.delete("Ecommerce Integration Log Archive", name)
+	_delete_unreferenced_file(file)
+
+	return log
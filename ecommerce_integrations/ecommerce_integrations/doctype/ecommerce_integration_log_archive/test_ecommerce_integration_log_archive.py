@@ -0,0 +1,94 @@
+# Copyright (c) 2026, Frappe and Contributors
+# See LICENSE
+
+import json
+import os
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days, now_datetime
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	create_log,
+)
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log_archive.ecommerce_integration_log_archive import (
+	archive_logs,
+	delete_old_archives,
+	get_archived_log,
+	restore_archived_log,
+)
+
+
+class TestEcommerceIntegrationLogArchive(IntegrationTestCase):
+	def test_archive_logs(self):
+		"""requirement: old logs are moved to files and can be read and restored individually"""
+		old_logs = []
+		for i in range(3):
+			log = create_log(
+				module_def="shopify",
+				status="Error",
+				method="ecommerce_integrations.shopify.order.sync_sales_order",
+				request_data={"id": i},
+				make_new=True,
+			)
+			frappe.db.set_value(
+				"Ecommerce Integration Log",
+				log.name,
+				"modified",
+				add_days(now_datetime(), -40 - i),
+				update_modified=False,
+			)
+			old_logs.append(log.name)
+		recent_log = create_log(module_def="shopify", status="Success", make_new=True)
+
+		self.assertGreaterEqual(archive_logs(days=30), 3)
+
+		self.assertTrue(frappe.db.exists("Ecommerce Integration Log", recent_log.name))
+		for i, name in enumerate(old_logs):
+			self.assertFalse(frappe.db.exists("Ecommerce Integration Log", name))
+			self.assertEqual(
+				frappe.db.get_value("Ecommerce Integration Log Archive", name, "status"), "Error"
+			)
+			self.assertEqual(json.loads(get_archived_log(name).request_data), {"id": i})
+
+		log = restore_archived_log(old_logs[1])
+		self.assertEqual(json.loads(log.request_data), {"id": 1})
+		self.assertTrue(frappe.db.exists("Ecommerce Integration Log", old_logs[1]))
+		self.assertFalse(frappe.db.exists("Ecommerce Integration Log Archive", old_logs[1]))
+
+		file = frappe.db.get_value("Ecommerce Integration Log Archive", old_logs[0], "file")
+		self.assertGreaterEqual(delete_old_archives(days=35), 1)
+		self.assertFalse(frappe.db.exists("Ecommerce Integration Log Archive", old_logs[0]))
+		self.assertFalse(frappe.db.exists("File", file))
+
+	@patch(
+		"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log_archive.ecommerce_integration_log_archive.MAX_SEGMENT_SIZE",
+		40 * 1024,
+	)
+	def test_archive_segment_size(self):
+		"""requirement: segments are rolled over before exceeding max size, even within a chunk"""
+		old_logs = []
+		for _ in range(4):
+			# random payload so that every log takes ~12KB in the segment
+			log = create_log(
+				module_def="shopify", request_data={"data": os.urandom(12 * 1024).hex()}, make_new=True
+			)
+			frappe.db.set_value(
+				"Ecommerce Integration Log",
+				log.name,
+				"modified",
+				add_days(now_datetime(), -40),
+				update_modified=False,
+			)
+			old_logs.append(log.name)
+
+		archive_logs(days=30)
+
+		files = set()
+		for name in old_logs:
+			file = frappe.db.get_value("Ecommerce Integration Log Archive", name, "file")
+			self.assertLessEqual(frappe.db.get_value("File", file, "file_size"), 40 * 1024)
+			self.assertTrue(get_archived_log(name))
+			files.add(file)
+		self.assertGreaterEqual(len(files), 2)
@@ -1,12 +1,30 @@
 # Copyright (c) 2021, Frappe and contributors
 # For license information, please see LICENSE
 
+from collections.abc import Iterable
+
 import frappe
 from erpnext import get_default_company
 from frappe import _
 from frappe.model.document import Document
 from frappe.utils import cstr, get_datetime, now
 
+# (integration_item_code, variant_id, sku) of an integration item.
+ItemKey = tuple[str | None, str | None, str | None]
+
+# redis hash per integration holding item code lookups, see `_get_cached_item_code`.
+ITEM_MAPPING_CACHE_KEY = "ecommerce_item_mapping"
+
+# composite indexes for item mapping lookups, `integration` alone isn't selective.
+ECOMMERCE_ITEM_INDEXES = [
+	["integration", "integration_item_code", "variant_id"],
+	["integration", "sku"],
+	["integration", "erpnext_item_code"],
+]
+
+# per-process counters of item mapping lookups.
+_cache_stats = {"hits": 0, "misses": 0}
+
 
 class EcommerceItem(Document):
 	erpnext_item_code: str  # item_code in ERPNext
@@ -23,6 +41,15 @@ class EcommerceItem(Document):
 	def before_insert(self):
 		self.check_unique_constraints()
 
+	def on_update(self):
+		clear_item_mapping_cache(self.integration)
+
+	def on_trash(self):
+		clear_item_mapping_cache(self.integration)
+
+	def after_rename(self, old, new, merge=False):
+		clear_item_mapping_cache(self.integration)
+
 	def check_unique_constraints(self) -> None:
 		filters = []
 
@@ -51,6 +78,11 @@ class EcommerceItem(Document):
 			self.inventory_synced_on = get_datetime("1970-01-01")
 
 
+def on_doctype_update():
+	for fields in ECOMMERCE_ITEM_INDEXES:
+		frappe.db.add_index("Ecommerce Item", fields)
+
+
 def is_synced(
 	integration: str,
 	integration_item_code: str,
@@ -64,12 +96,7 @@ def is_synced(
 	        integration: shopify,
 	        integration_item_code: TSHIRT
 	"""
-	filter = {"integration": integration, "integration_item_code": integration_item_code}
-
-	if variant_id:
-		filter.update({"variant_id": variant_id})
-
-	item_exists = bool(frappe.db.exists("Ecommerce Item", filter))
+	item_exists = bool(get_erpnext_item_code(integration, integration_item_code, variant_id=variant_id))
 
 	if not item_exists and sku:
 		return _is_sku_synced(integration, sku)
@@ -77,8 +104,7 @@ def is_synced(
 
 
 def _is_sku_synced(integration: str, sku: str) -> bool:
-	filter = {"integration": integration, "sku": sku}
-	return bool(frappe.db.exists("Ecommerce Item", filter))
+	return bool(_get_item_code_by_sku(integration, sku))
 
 
 def get_erpnext_item_code(
@@ -93,7 +119,12 @@ def get_erpnext_item_code(
 	elif has_variants:
 		filters.update({"has_variants": 1})
 
-	return frappe.db.get_value("Ecommerce Item", filters, fieldname="erpnext_item_code")
+	key = ("code", integration_item_code, variant_id or "", int(not variant_id and bool(has_variants)))
+	return _get_cached_item_code(integration, key, filters)
+
+
+def _get_item_code_by_sku(integration: str, sku: str) -> str | None:
+	return _get_cached_item_code(integration, ("sku", sku), {"sku": sku, "integration": integration})
 
 
 def get_erpnext_item(
@@ -110,9 +141,7 @@ def get_erpnext_item(
 
 	item_code = None
 	if sku:
-		item_code = frappe.db.get_value(
-			"Ecommerce Item", {"sku": sku, "integration": integration}, fieldname="erpnext_item_code"
-		)
+		item_code = _get_item_code_by_sku(integration, sku)
 	if not item_code:
 		item_code = get_erpnext_item_code(
 			integration, integration_item_code, variant_id=variant_id, has_variants=has_variants
@@ -122,6 +151,112 @@ def get_erpnext_item(
 		return frappe.get_doc("Item", item_code)
 
 
+def get_erpnext_item_codes(integration: str, item_keys: Iterable[ItemKey]) -> dict[ItemKey, str | None]:
+	"""Get ERPNext item codes of multiple integration items, e.g. all lines of an order, using one query.
+
+	Each key is (integration_item_code, variant_id, sku). Items are resolved same as `get_erpnext_item`
+	i.e. SKU is matched first, followed by product and variant id.
+	"""
+	item_keys = set(item_keys)
+	item_codes = {cstr(key[0]) for key in item_keys if key[0]}
+	skus = {cstr(key[2]) for key in item_keys if key[2]}
+
+	or_filters = []
+	if item_codes:
+		or_filters.append(["integration_item_code", "in", list(item_codes)])
+	if skus:
+		or_filters.append(["sku", "in", list(skus)])
+	if not or_filters:
+		return dict.fromkeys(item_keys)
+
+	mappings = frappe.get_all(
+		"Ecommerce Item",
+		filters={"integration": integration},
+		or_filters=or_filters,
+		fields=["erpnext_item_code", "integration_item_code", "variant_id", "sku"],
+		order_by="modified desc",
+	)
+
+	# first match wins, same as `frappe.db.get_value` with default ordering.
+	by_sku, by_variant, by_product = {}, {}, {}
+	for mapping in mappings:
+		if mapping.sku:
+			by_sku.setdefault(mapping.sku, mapping.erpnext_item_code)
+		by_variant.setdefault((mapping.integration_item_code, mapping.variant_id), mapping.erpnext_item_code)
+		by_product.setdefault(mapping.integration_item_code, mapping.erpnext_item_code)
+
+	resolved = {}
+	for key in item_keys:
+		integration_item_code, variant_id, sku = (cstr(k) for k in key)
+		item_code = by_sku.get(sku) if sku else None
+		if not item_code and variant_id:
+			item_code = by_variant.get((integration_item_code, variant_id))
+		elif not item_code:
+			item_code = by_product.get(integration_item_code)
+
+		# DB comparisons can be case/whitespace insensitive, fallback to regular (cached) lookups.
+		if not item_code and sku:
+			item_code = _get_item_code_by_sku(integration, sku)
+		if not item_code and integration_item_code:
+			item_code = get_erpnext_item_code(integration, integration_item_code, variant_id=variant_id)
+		resolved[key] = item_code
+
+	return resolved
+
+
+def _get_cached_item_code(integration: str, key: tuple, filters: dict) -> str | None:
+	"""Get `erpnext_item_code` of Ecommerce Item matching filters.
+
+	Found mappings are cached in redis (and in memory for current request/job by `hget`), cache of
+	an integration is cleared whenever any of its items change. Missing mappings aren't cached as
+	a lookup made while the item is being inserted could cache the miss after cache is cleared."""
+	field = "|".join(cstr(k) for k in key)
+
+	item_code = frappe.cache.hget(_get_cache_key(integration), field)
+	if item_code:
+		_cache_stats["hits"] += 1
+		return item_code
+
+	_cache_stats["misses"] += 1
+	item_code = frappe.db.get_value("Ecommerce Item", filters, fieldname="erpnext_item_code")
+	if item_code:
+		frappe.cache.hset(_get_cache_key(integration), field, item_code)
+
+	return item_code or None
+
+
+def clear_item_mapping_cache(integration: str | None = None) -> None:
+	"""Clear cached item mapping of an integration, or of all integrations if not specified.
+
+	Cache is cleared again after transaction ends so that lookups made by other processes in
+	between don't cache uncommitted (or rolled back) state."""
+
+	def clear():
+		if integration:
+			frappe.cache.delete_value(_get_cache_key(integration))
+		else:
+			frappe.cache.delete_keys(ITEM_MAPPING_CACHE_KEY)
+
+	clear()
+	frappe.db.after_commit.add(clear)
+	frappe.db.after_rollback.add(clear)
+
+
+def clear_cache_on_item_rename(doc, method=None, *args, **kwargs):
+	"""Item renames update `erpnext_item_code` without triggering Ecommerce Item hooks."""
+	clear_item_mapping_cache()
+
+
+def get_cache_stats() -> dict:
+	"""Item mapping cache counters of current process."""
+	total = sum(_cache_stats.values())
+	return {**_cache_stats, "hit_rate": _cache_stats["hits"] / total if total else 0.0}
+
+
+def _get_cache_key(integration: str) -> str:
+	return f"{ITEM_MAPPING_CACHE_KEY}:{integration}"
+
+
 def create_ecommerce_item(
 	integration: str,
 	integration_item_code: str,
@@ -130,6 +265,7 @@ def create_ecommerce_item(
 	sku: str | None = None,
 	variant_of: str | None = None,
 	has_variants=0,
+	inventory_item_id: str | None = None,
 ) -> None:
 	"""Create Item in erpnext and link it with Ecommerce item doctype.
 
@@ -164,6 +300,7 @@ def create_ecommerce_item(
 			"integration_item_code": integration_item_code,
 			"has_variants": has_variants,
 			"variant_id": cstr(variant_id),
+			"inventory_item_id": cstr(inventory_item_id),
 			"variant_of": cstr(variant_of),
 			"sku": sku,
 			"item_synced_on": now(),
@@ -63,6 +63,35 @@ class TestEcommerceItem(IntegrationTestCase):
 		self.assertEqual(a.name, b.name)
 		self.assertEqual(a.item_code, b.item_code)
 
+	def test_item_mapping_cache(self):
+		self.assertFalse(ecommerce_item.is_synced("shopify", "T-SHIRT"))
+
+		# missing mapping is not cached
+		self._create_doc()
+		self.assertTrue(ecommerce_item.is_synced("shopify", "T-SHIRT"))
+
+		hits = ecommerce_item.get_cache_stats()["hits"]
+		self.assertEqual(ecommerce_item.get_erpnext_item_code("shopify", "T-SHIRT"), "_Test Item")
+		self.assertEqual(ecommerce_item.get_cache_stats()["hits"], hits + 1)
+
+		frappe.get_doc("Ecommerce Item", {"integration_item_code": "T-SHIRT"}).delete()
+		self.assertFalse(ecommerce_item.is_synced("shopify", "T-SHIRT"))
+
+	def test_get_erpnext_item_codes(self):
+		self._create_variant_doc()
+		self._create_doc_with_sku()
+
+		keys = [
+			("T-SHIRT", "T-SHIRT-RED", None),
+			("T-SHIRT", None, "TEST_ITEM_1"),
+			("UNKNOWN", None, None),
+		]
+		item_codes = ecommerce_item.get_erpnext_item_codes("shopify", keys)
+
+		self.assertEqual(item_codes[keys[0]], "_Test Item 2")
+		self.assertEqual(item_codes[keys[1]], "_Test Item")
+		self.assertIsNone(item_codes[keys[2]])
+
 	def _create_doc(self):
 		"""basic test for creation of ecommerce item"""
 		frappe.get_doc(
@@ -76,6 +76,9 @@ doctype_js = {
 
 before_uninstall = "ecommerce_integrations.uninstall.before_uninstall"
 
+# custom fields of an integration are created when it's set up, index them on next migrate.
+after_migrate = "ecommerce_integrations.utils.indexes.add_integration_link_indexes"
+
 # Desk Notifications
 # ------------------
 # See frappe.core.notifications.get_notification_config
@@ -110,14 +113,39 @@ doc_events = {
 	"Item": {
 		"after_insert": "ecommerce_integrations.shopify.product.upload_erpnext_item",
 		"on_update": "ecommerce_integrations.shopify.product.upload_erpnext_item",
+		"after_rename": "ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item.ecommerce_item.clear_cache_on_item_rename",
 		"validate": [
 			"ecommerce_integrations.utils.taxation.validate_tax_template",
 			"ecommerce_integrations.unicommerce.product.validate_item",
 		],
 	},
 	"Sales Order": {
-		"on_update_after_submit": "ecommerce_integrations.unicommerce.order.update_shipping_info",
-		"on_cancel": "ecommerce_integrations.unicommerce.status_updater.ignore_pick_list_on_sales_order_cancel",
+		"on_submit": [
+			"ecommerce_integrations.shopify.inventory.mark_inventory_dirty_on_stock_change",
+			"ecommerce_integrations.unicommerce.inventory.mark_inventory_dirty_on_stock_change",
+		],
+		"on_update_after_submit": [
+			"ecommerce_integrations.unicommerce.order.update_shipping_info",
+			"ecommerce_integrations.shopify.inventory.mark_inventory_dirty_on_stock_change",
+			"ecommerce_integrations.unicommerce.inventory.mark_inventory_dirty_on_stock_change",
+		],
+		"on_cancel": [
+			"ecommerce_integrations.unicommerce.status_updater.ignore_pick_list_on_sales_order_cancel",
+			"ecommerce_integrations.shopify.inventory.mark_inventory_dirty_on_stock_change",
+			"ecommerce_integrations.unicommerce.inventory.mark_inventory_dirty_on_stock_change",
+		],
+	},
+	"Stock Ledger Entry": {
+		"on_submit": [
+			"ecommerce_integrations.shopify.inventory.mark_inventory_dirty_on_stock_change",
+			"ecommerce_integrations.unicommerce.inventory.mark_inventory_dirty_on_stock_change",
+		],
+	},
+	"Bin": {
+		"on_update": [
+			"ecommerce_integrations.shopify.inventory.mark_inventory_dirty_on_stock_change",
+			"ecommerce_integrations.unicommerce.inventory.mark_inventory_dirty_on_stock_change",
+		],
 	},
 	"Stock Entry": {
 		"validate": "ecommerce_integrations.unicommerce.grn.validate_stock_entry_for_grn",
@@ -138,7 +166,10 @@ doc_events = {
 scheduler_events = {
 	"all": ["ecommerce_integrations.shopify.inventory.update_inventory_on_shopify"],
 	"daily": [],
-	"daily_long": ["ecommerce_integrations.zenoti.doctype.zenoti_settings.zenoti_settings.sync_stocks"],
+	"daily_long": [
+		"ecommerce_integrations.zenoti.doctype.zenoti_settings.zenoti_settings.sync_stocks",
+		"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log_archive.ecommerce_integration_log_archive.archive_logs",
+	],
 	"hourly": [
 		"ecommerce_integrations.shopify.order.sync_old_orders",
 		"ecommerce_integrations.amazon.doctype.amazon_sp_api_settings.amazon_sp_api_settings.schedule_get_order_details",
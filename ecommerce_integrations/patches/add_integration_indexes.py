@@ -0,0 +1,13 @@
+import frappe
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item.ecommerce_item import (
+	on_doctype_update,
+)
+from ecommerce_integrations.utils.indexes import add_integration_link_indexes
+
+
+def execute():
+	frappe.reload_doc("ecommerce_integrations", "doctype", "ecommerce_item")
+
+	on_doctype_update()
+	add_integration_link_indexes()
@@ -0,0 +1,17 @@
+import frappe
+
+from ecommerce_integrations.shopify.constants import SETTING_DOCTYPE
+
+
+def execute():
+	frappe.reload_doc("ecommerce_integrations", "doctype", "ecommerce_item")
+
+	if not frappe.db.get_single_value(SETTING_DOCTYPE, "enable_shopify"):
+		return
+
+	# IDs are fetched in background, inventory sync fetches missing IDs on its own till then.
+	frappe.enqueue(
+		"ecommerce_integrations.shopify.inventory.backfill_inventory_item_ids",
+		queue="long",
+		enqueue_after_commit=True,
+	)
@@ -0,0 +1,18 @@
+import frappe
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	should_compress_logs,
+)
+
+
+def execute():
+	if not should_compress_logs():
+		return
+
+	# existing logs are compressed in background, they can be read in both formats.
+	frappe.enqueue(
+		"ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log.compress_logs",
+		queue="long",
+		timeout=4 * 60 * 60,
+		enqueue_after_commit=True,
+	)
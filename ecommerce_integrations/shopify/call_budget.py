@@ -0,0 +1,140 @@
+"""Shopify API call budget shared by all workers of a site.
+
+Shopify rate limits REST API calls using a leaky bucket per store. Every response reports
+the current state of bucket in `X-Shopify-Shop-Api-Call-Limit` header (e.g. "32/40").
+The last reported state is kept in redis so that all workers can estimate the available
+budget before making a call, instead of finding out about it with a 429 response.
+
+Lower priority calls leave some headroom in the bucket so that order processing can go
+ahead of bulk work like inventory sync and catalog import.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint
+from shopify.base import ShopifyConnection, ShopifyResource
+
+API_CALL_LIMIT_HEADER = "X-Shopify-Shop-Api-Call-Limit"
+CALL_BUDGET_CACHE_KEY = "shopify_api_call_budget"
+
+DEFAULT_BUCKET_SIZE = 40
+# Shopify bucket leaks completely in 20 seconds irrespective of plan, i.e. 2 calls/second for 40 size bucket.
+BUCKET_LEAK_TIME = 20
+# Don't wait longer than this for budget, Shopify will throttle the request if it's still not available.
+MAX_WAIT_TIME = 60
+
+
+class CallPriority:
+	HIGH = "high"  # order processing
+	NORMAL = "normal"  # inventory sync, item uploads
+	LOW = "low"  # bulk catalog import
+
+
+# fraction of bucket left unused for higher priority calls.
+PRIORITY_HEADROOM = {
+	CallPriority.HIGH: 0.0,
+	CallPriority.NORMAL: 0.25,
+	CallPriority.LOW: 0.5,
+}
+
+
+class BudgetedShopifyConnection(ShopifyConnection):
+	"""Shopify connection which waits for call budget before making any call and
+	updates the budget from response headers."""
+
+	def _open(self, *args, **kwargs):
+		acquire_call_budget(frappe.flags.shopify_api_priority or CallPriority.NORMAL)
+		try:
+			return super()._open(*args, **kwargs)
+		finally:
+			if self.response is not None:
+				record_call_limit(self.response.headers)
+
+
+@contextmanager
+def call_priority(priority: str):
+	"""Use `priority` for calls of Shopify sessions opened inside, unless they specify their own.
+
+	Can also be used as a decorator, e.g. `@call_priority(CallPriority.HIGH)`."""
+	outer_priority = frappe.flags.shopify_api_priority
+	frappe.flags.shopify_api_priority = priority
+	try:
+		yield
+	finally:
+		frappe.flags.shopify_api_priority = outer_priority
+
+
+def activate_call_budget() -> None:
+	"""Route all API calls of currently active Shopify session via call budget.
+
+	Connections are created lazily per thread by ShopifyResource, so the default connection of
+	active session is replaced with one that uses the call budget."""
+	ShopifyResource.connection  # initializes thread local details of active session
+	ShopifyResource._threadlocal.connection = BudgetedShopifyConnection(
+		ShopifyResource.site,
+		ShopifyResource.user,
+		ShopifyResource.password,
+		ShopifyResource.timeout,
+		ShopifyResource.format,
+	)
+
+
+def acquire_call_budget(priority: str = CallPriority.NORMAL) -> None:
+	"""Wait till bucket has room for a call of specified priority and reserve it."""
+	deadline = time.monotonic() + MAX_WAIT_TIME
+
+	while True:
+		used, limit = get_call_budget()
+		allowed = limit - math.ceil(limit * PRIORITY_HEADROOM.get(priority, 0))
+
+		if used + 1 <= allowed or time.monotonic() >= deadline:
+			# Reservation is best effort, concurrent reservations can overwrite each other
+			# but next response from Shopify will correct the usage.
+			_set_call_budget(used + 1, limit)
+			return
+
+		leak_rate = limit / BUCKET_LEAK_TIME
+		time.sleep(max(0, min((used + 1 - allowed) / leak_rate, deadline - time.monotonic())))
+
+
+def get_call_budget() -> tuple[float, int]:
+	"""Get estimated (used, limit) of the bucket at current time."""
+	state = frappe.cache.get_value(CALL_BUDGET_CACHE_KEY) or {}
+	limit = cint(state.get("limit")) or DEFAULT_BUCKET_SIZE
+
+	elapsed = time.time() - state.get("updated_at", 0)
+	used = max(0.0, state.get("used", 0) - elapsed * limit / BUCKET_LEAK_TIME)
+
+	return used, limit
+
+
+def record_call_limit(headers) -> None:
+	"""Update the bucket state using `X-Shopify-Shop-Api-Call-Limit` response header."""
+	call_limit = _get_header(headers, API_CALL_LIMIT_HEADER)
+	if not call_limit:
+		return
+
+	try:
+		used, limit = (cint(v) for v in call_limit.split("/"))
+	except ValueError:
+		return
+
+	if limit:
+		_set_call_budget(used, limit)
+
+
+def _set_call_budget(used: float, limit: int) -> None:
+	frappe.cache.set_value(
+		CALL_BUDGET_CACHE_KEY,
+		{"used": used, "limit": limit, "updated_at": time.time()},
+		expires_in_sec=BUCKET_LEAK_TIME * 3,
+	)
+
+
+def _get_header(headers, name: str) -> str | None:
+	for key, value in (headers or {}).items():
+		if key.lower() == name.lower():
+			return value
@@ -9,6 +9,7 @@ from frappe import _
 from shopify.resources import Webhook
 from shopify.session import Session
 
+from ecommerce_integrations.shopify.call_budget import CallPriority, activate_call_budget
 from ecommerce_integrations.shopify.constants import (
 	API_VERSION,
 	EVENT_MAPPER,
@@ -18,8 +19,15 @@ from ecommerce_integrations.shopify.constants import (
 from ecommerce_integrations.shopify.utils import create_shopify_log
 
 
-def temp_shopify_session(func):
-	"""Any function that needs to access shopify api needs this decorator. The decorator starts a temp session that's destroyed when function returns."""
+def temp_shopify_session(func=None, *, priority: str | None = None):
+	"""Any function that needs to access shopify api needs this decorator. The decorator starts a temp session that's destroyed when function returns.
+
+	API calls made in session wait for the shared call budget, see `call_budget`. Priority
+	of calls can be specified as `@temp_shopify_session(priority=CallPriority.HIGH)`,
+	nested sessions inherit priority of outer session or `call_priority` if not specified."""
+
+	if func is None:
+		return functools.partial(temp_shopify_session, priority=priority)
 
 	@functools.wraps(func)
 	def wrapper(*args, **kwargs):
@@ -31,8 +39,20 @@ def temp_shopify_session(func):
 		if setting.is_enabled():
 			auth_details = (setting.shopify_url, API_VERSION, setting.get_password("password"))
 
-			with Session.temp(*auth_details):
-				return func(*args, **kwargs)
+			outer_priority = frappe.flags.shopify_api_priority
+			in_outer_session = frappe.flags.in_shopify_session
+			frappe.flags.shopify_api_priority = priority or outer_priority or CallPriority.NORMAL
+			frappe.flags.in_shopify_session = True
+			try:
+				with Session.temp(*auth_details):
+					activate_call_budget()
+					return func(*args, **kwargs)
+			finally:
+				frappe.flags.shopify_api_priority = outer_priority
+				frappe.flags.in_shopify_session = in_outer_session
+				if in_outer_session:
+					# outer session is restored with a new default connection.
+					activate_call_budget()
 
 	return wrapper
 
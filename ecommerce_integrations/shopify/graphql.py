@@ -0,0 +1,175 @@
+"""Shopify GraphQL Admin API client with cost based rate limiting.
+
+GraphQL calls are rate limited using cost of queries instead of number of calls. Every
+response reports the state of cost bucket in `extensions.cost.throttleStatus`, the last
+reported state is kept in redis so that all workers can wait for enough budget before
+making a call, similar to REST call budget in `call_budget`.
+"""
+
+import os
+import time
+
+import frappe
+import requests
+from frappe.utils import flt
+from requests.adapters import HTTPAdapter
+from shopify.base import ShopifyResource
+
+GRAPHQL_COST_CACHE_KEY = "shopify_graphql_cost_budget"
+
+# Bucket size and restore rate of standard plans, updated from response of first call.
+DEFAULT_MAXIMUM_AVAILABLE = 1000
+DEFAULT_RESTORE_RATE = 50  # points per second
+# Don't wait longer than this for budget, Shopify will throttle the query if it's still not available.
+MAX_WAIT_TIME = 60
+MAX_THROTTLE_RETRIES = 3
+# (connect, read) timeout in seconds.
+DEFAULT_TIMEOUT = (10, 120)
+DEFAULT_POOL_SIZE = 10
+
+# Session is shared by all clients in a worker process, see `get_session`.
+_session: requests.Session | None = None
+_session_pid: int | None = None
+
+
+class ShopifyGraphQLError(Exception):
+	def __init__(self, errors):
+		self.errors = errors
+		super().__init__(", ".join(str(error.get("message")) for error in errors))
+
+
+class ShopifyGraphQLClient:
+	"""Execute GraphQL queries on Shopify Admin API.
+
+	Endpoint and auth headers of active Shopify session are used if not specified."""
+
+	def __init__(self, endpoint: str | None = None, headers: dict | None = None, timeout=DEFAULT_TIMEOUT):
+		self.endpoint = endpoint or ShopifyResource.get_site() + "/graphql.json"
+		self.headers = {"Accept": "application/json", "Content-Type": "application/json"}
+		self.headers.update(ShopifyResource.get_headers() if headers is None else headers)
+		self.timeout = timeout
+		self.session = get_session()
+
+	def execute(self, query: str, variables: dict | None = None, estimated_cost: int = 10) -> dict:
+		"""Wait for cost budget, execute the query and return `data` from response.
+
+		Throttled queries and rate limited (HTTP 429) requests are retried, other errors are raised
+		as `ShopifyGraphQLError`."""
+		for attempt in range(MAX_THROTTLE_RETRIES + 1):
+			acquire_cost_budget(estimated_cost)
+
+			response = self.session.post(
+				self.endpoint,
+				json={"query": query, "variables": variables},
+				headers=self.headers,
+				timeout=self.timeout,
+			)
+			if response.status_code == 429 and attempt < MAX_THROTTLE_RETRIES:
+				_record_rate_limited(response.headers.get("Retry-After"))
+				continue
+			response.raise_for_status()
+			result = response.json()
+
+			cost = (result.get("extensions") or {}).get("cost") or {}
+			record_throttle_status(cost.get("throttleStatus"))
+
+			errors = result.get("errors")
+			if not errors:
+				return result.get("data") or {}
+
+			if not _is_throttled(errors) or attempt == MAX_THROTTLE_RETRIES:
+				raise ShopifyGraphQLError(errors)
+
+			estimated_cost = cost.get("requestedQueryCost") or estimated_cost
+
+
+def get_session() -> requests.Session:
+	"""Get keep-alive HTTP session for current worker process, new session is created after fork."""
+	global _session, _session_pid
+
+	if _session is None or _session_pid != os.getpid():
+		adapter = HTTPAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE)
+
+		session = requests.Session()
+		session.mount("https://", adapter)
+		session.mount("http://", adapter)
+
+		_session, _session_pid = session, os.getpid()
+
+	return _session
+
+
+def acquire_cost_budget(cost: float) -> None:
+	"""Wait till bucket has enough points available for a query and reserve them."""
+	deadline = time.monotonic() + MAX_WAIT_TIME
+
+	while True:
+		available, maximum, restore_rate = get_cost_budget()
+		required = min(cost, maximum)
+
+		if available >= required or time.monotonic() >= deadline:
+			# Reservation is best effort, next response from Shopify will correct the state.
+			_set_cost_budget(available - cost, maximum, restore_rate)
+			return
+
+		time.sleep(max(0, min((required - available) / restore_rate, deadline - time.monotonic())))
+
+
+def get_cost_budget() -> tuple[float, float, float]:
+	"""Get estimated (available, maximum, restore_rate) of the bucket at current time."""
+	state = frappe.cache.get_value(GRAPHQL_COST_CACHE_KEY) or {}
+	maximum = state.get("maximum") or DEFAULT_MAXIMUM_AVAILABLE
+	restore_rate = state.get("restore_rate") or DEFAULT_RESTORE_RATE
+
+	elapsed = time.time() - state.get("updated_at", 0)
+	available = min(maximum, state.get("available", maximum) + elapsed * restore_rate)
+
+	return available, maximum, restore_rate
+
+
+def record_throttle_status(throttle_status: dict | None) -> None:
+	"""Update the bucket state using `throttleStatus` reported in response."""
+	if not throttle_status:
+		return
+
+	_set_cost_budget(
+		throttle_status.get("currentlyAvailable", 0),
+		throttle_status.get("maximumAvailable") or DEFAULT_MAXIMUM_AVAILABLE,
+		throttle_status.get("restoreRate") or DEFAULT_RESTORE_RATE,
+	)
+
+
+def _record_rate_limited(retry_after: str | None) -> None:
+	"""Empty the bucket so that all workers wait for it to restore, and wait `Retry-After` if sent."""
+	_, maximum, restore_rate = get_cost_budget()
+	_set_cost_budget(0, maximum, restore_rate)
+
+	if retry_after:
+		time.sleep(min(flt(retry_after), MAX_WAIT_TIME))
+
+
+def get_gid(resource: str, id) -> str:
+	"""Global ID used by GraphQL API from REST resource ID, e.g. gid://shopify/Location/123"""
+	return f"gid://shopify/{resource}/{id}"
+
+
+def get_legacy_id(gid: str) -> str:
+	"""REST resource ID from GraphQL global ID."""
+	return gid.rsplit("/", 1)[-1]
+
+
+def _set_cost_budget(available: float, maximum: float, restore_rate: float) -> None:
+	frappe.cache.set_value(
+		GRAPHQL_COST_CACHE_KEY,
+		{
+			"available": available,
+			"maximum": maximum,
+			"restore_rate": restore_rate,
+			"updated_at": time.time(),
+		},
+		expires_in_sec=int(maximum / restore_rate) * 3,
+	)
+
+
+def _is_throttled(errors) -> bool:
+	return any((error.get("extensions") or {}).get("code") == "THROTTLED" for error in errors)
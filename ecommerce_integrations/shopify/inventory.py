@@ -1,19 +1,64 @@
-from collections import Counter
+from collections import Counter, defaultdict
+from collections.abc import Iterator
 
 import frappe
-from frappe.utils import cint, create_batch, now
+from frappe.utils import cint, create_batch, cstr, now
 from pyactiveresource.connection import ResourceNotFound
-from shopify.resources import InventoryLevel, Variant
+from shopify.resources import InventoryLevel, Product, Variant
 
 from ecommerce_integrations.controllers.inventory import (
-	get_inventory_levels,
-	update_inventory_sync_status,
+	bulk_update_inventory_sync_status,
+	get_inventory_level_pages,
+	get_pushed_quantities,
+	get_stock_changes,
+	mark_inventory_dirty,
+	needs_full_inventory_sync,
+	pop_dirty_inventory,
+	record_pushed_quantities,
+	set_full_inventory_synced,
 )
 from ecommerce_integrations.controllers.scheduling import need_to_run
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	buffered_logs,
+)
+from ecommerce_integrations.shopify.call_budget import CallPriority
 from ecommerce_integrations.shopify.connection import temp_shopify_session
 from ecommerce_integrations.shopify.constants import MODULE_NAME, SETTING_DOCTYPE
+from ecommerce_integrations.shopify.graphql import ShopifyGraphQLClient, get_gid, get_legacy_id
 from ecommerce_integrations.shopify.utils import create_shopify_log
 
+# default number of inventory levels uploaded, committed and logged together.
+INVENTORY_SYNC_BATCH_SIZE = 50
+# max products fetched in one call by `backfill_inventory_item_ids`, limited by Shopify.
+PRODUCT_FETCH_BATCH_SIZE = 250
+# max quantities set in one `inventorySetQuantities` mutation, limited by Shopify.
+GRAPHQL_INVENTORY_BATCH_SIZE = 250
+
+INVENTORY_SET_QUANTITIES_MUTATION = """
+mutation inventorySetQuantities($input: InventorySetQuantitiesInput!) {
+	inventorySetQuantities(input: $input) {
+		userErrors {
+			field
+			message
+			code
+		}
+	}
+}
+"""
+
+VARIANT_INVENTORY_ITEMS_QUERY = """
+query variantInventoryItems($ids: [ID!]!) {
+	nodes(ids: $ids) {
+		... on ProductVariant {
+			id
+			inventoryItem {
+				id
+			}
+		}
+	}
+}
+"""
+
 
 def update_inventory_on_shopify() -> None:
 	"""Upload stock levels from ERPNext to Shopify.
@@ -29,47 +74,360 @@ def update_inventory_on_shopify() -> None:
 		return
 
 	warehous_map = setting.get_erpnext_to_integration_wh_mapping()
-	inventory_levels = get_inventory_levels(tuple(warehous_map.keys()), MODULE_NAME)
+	use_graphql = setting.inventory_sync_method == "GraphQL"
+	batch_size = cint(setting.inventory_sync_batch_size) or _get_default_batch_size(use_graphql)
+
+	# only changed stock is synced, all Bins are checked periodically to find missed changes.
+	full_sync = needs_full_inventory_sync(MODULE_NAME)
+	dirty_inventory = pop_dirty_inventory(MODULE_NAME)
+
+	item_codes = None
+	if not full_sync:
+		item_codes = {item_code for item_code, warehouse in dirty_inventory if warehouse in warehous_map}
+		if not item_codes:
+			return
+
+	inventory_pages = get_inventory_level_pages(
+		tuple(warehous_map.keys()),
+		MODULE_NAME,
+		page_size=batch_size,
+		item_codes=item_codes,
+	)
+
+	failed_changes = set()
+	try:
+		# one log is created per batch, they are written together.
+		with buffered_logs():
+			for inventory_levels in inventory_pages:
+				upload_inventory_data_to_shopify(
+					inventory_levels, warehous_map, use_graphql=use_graphql, batch_size=batch_size
+				)
+				failed_changes.update(
+					(d.item_code, d.warehouse) for d in inventory_levels if d.status == "Failed"
+				)
+	except Exception:
+		mark_inventory_dirty(MODULE_NAME, dirty_inventory, on_commit=False)
+		raise
+
+	# retry failed items in next run
+	mark_inventory_dirty(MODULE_NAME, failed_changes, on_commit=False)
+	if full_sync:
+		set_full_inventory_synced(MODULE_NAME)
+
 
-	if inventory_levels:
-		upload_inventory_data_to_shopify(inventory_levels, warehous_map)
+def mark_inventory_dirty_on_stock_change(doc, method=None) -> None:
+	"""Track stock changes so that only changed inventory is synced, see `get_stock_changes`."""
+	setting = frappe.get_cached_doc(SETTING_DOCTYPE)
+	if setting.is_enabled() and setting.update_erpnext_stock_levels_to_shopify:
+		mark_inventory_dirty(MODULE_NAME, get_stock_changes(doc))
 
 
 @temp_shopify_session
-def upload_inventory_data_to_shopify(inventory_levels, warehous_map) -> None:
+def upload_inventory_data_to_shopify(
+	inventory_levels, warehous_map, use_graphql=False, batch_size: int | None = None
+) -> None:
+	"""Set inventory levels on Shopify.
+
+	Quantities are set using a REST call per inventory level or if `use_graphql` is set, in
+	batches using GraphQL `inventorySetQuantities` mutation.
+
+	Inventory levels are pushed in batches of `batch_size`, sync status of each batch is saved
+	with a single update and commit, so at most one batch is pushed again after a crash.
+
+	Inventory levels with same quantity as last pushed to the location are skipped and
+	`status` of each inventory level is set to one of Success, Not Found, Failed or Skipped."""
 	synced_on = now()
+	batch_size = batch_size or _get_default_batch_size(use_graphql)
+	# locations found to be deleted or unmapped on Shopify, their inventory levels aren't set.
+	missing_locations = set()
 
-	for inventory_sync_batch in create_batch(inventory_levels, 50):
+	for inventory_sync_batch in create_batch(inventory_levels, batch_size):
 		for d in inventory_sync_batch:
 			d.shopify_location_id = warehous_map[d.warehouse]
+			# shopify doesn't support fractional quantity
+			d.available = cint(d.actual_qty) - cint(d.reserved_qty)
+
+		pushed_quantities = get_pushed_quantities(
+			MODULE_NAME, [(d.ecom_item, d.shopify_location_id) for d in inventory_sync_batch]
+		)
+
+		for d in inventory_sync_batch:
+			if pushed_quantities.get((d.ecom_item, d.shopify_location_id)) == d.available:
+				d.status = "Skipped"
+
+		changed_inventory = [d for d in inventory_sync_batch if d.status != "Skipped"]
+		if use_graphql:
+			_set_inventory_levels_graphql(changed_inventory)
+		else:
+			for d in changed_inventory:
+				if d.shopify_location_id in missing_locations:
+					d.status = "Not Found"
+					continue
+				try:
+					_set_inventory_level(d, missing_locations)
+					d.status = "Success"
+				except ResourceNotFound:
+					# Variant or location is deleted, mark as last synced and ignore.
+					d.status = "Not Found"
+				except Exception as e:
+					d.status = "Failed"
+					d.failure_reason = str(e)
+
+		record_pushed_quantities(
+			MODULE_NAME,
+			{
+				(d.ecom_item, d.shopify_location_id): d.available
+				for d in inventory_sync_batch
+				if d.status == "Success"
+			},
+		)
+
+		synced_items = [
+			d.ecom_item for d in inventory_sync_batch if d.status in ("Success", "Not Found", "Skipped")
+		]
+		bulk_update_inventory_sync_status(synced_items, time=synced_on)
+		frappe.db.commit()
+
+		_log_inventory_update_status(inventory_sync_batch)
+
+
+def _get_default_batch_size(use_graphql: bool) -> int:
+	return GRAPHQL_INVENTORY_BATCH_SIZE if use_graphql else INVENTORY_SYNC_BATCH_SIZE
+
+
+def _set_inventory_level(d, missing_locations: set | None = None) -> None:
+	"""Set available quantity of variant at location.
+
+	Inventory item ID saved on Ecommerce Item is used if available so that only one call is
+	required. If Shopify can't find it, variant is fetched to check whether the ID is stale and
+	it's updated only if variant has a different one. Otherwise location is added to
+	`missing_locations` and `ResourceNotFound` is raised. Deleted variants raise it too."""
+	variant = None
+	if not d.inventory_item_id:
+		variant = Variant.find(d.variant_id)
+		_update_inventory_item_id(d, variant)
+
+	try:
+		_set_available_quantity(d)
+		return
+	except ResourceNotFound:
+		variant = variant or Variant.find(d.variant_id)
+		if cstr(variant.inventory_item_id) == d.inventory_item_id:
+			# inventory item exists, so the location is deleted or unmapped.
+			if missing_locations is not None:
+				missing_locations.add(d.shopify_location_id)
+			raise
+
+	_update_inventory_item_id(d, variant)
+	_set_available_quantity(d)
+
+
+def _set_available_quantity(d) -> None:
+	InventoryLevel.set(
+		location_id=d.shopify_location_id, inventory_item_id=d.inventory_item_id, available=d.available
+	)
+
+
+def _update_inventory_item_id(d, variant) -> None:
+	d.inventory_item_id = cstr(variant.inventory_item_id)
+	_save_inventory_item_id(d.ecom_item, d.inventory_item_id)
+
+
+def _set_inventory_levels_graphql(inventory_levels, client: ShopifyGraphQLClient | None = None) -> None:
+	"""Set available quantities using `inventorySetQuantities` mutation for a batch of inventory levels.
 
+	Shopify rejects the whole mutation if any of the quantities is invalid, so user errors are
+	mapped back to their inventory levels and rest of the batch is retried without them.
+	`status` and `failure_reason` are set same as REST calls."""
+	if client is None:
+		client = ShopifyGraphQLClient()
+
+	_fetch_inventory_item_ids(client, inventory_levels)
+
+	pending = [d for d in inventory_levels if d.inventory_item_id and not d.status]
+	for batch in create_batch(pending, GRAPHQL_INVENTORY_BATCH_SIZE):
+		batch = list(batch)
+		while batch:
+			quantities = [
+				{
+					"inventoryItemId": get_gid("InventoryItem", d.inventory_item_id),
+					"locationId": get_gid("Location", d.shopify_location_id),
+					"quantity": d.available,
+				}
+				for d in batch
+			]
 			try:
-				variant = Variant.find(d.variant_id)
-				inventory_id = variant.inventory_item_id
-
-				InventoryLevel.set(
-					location_id=d.shopify_location_id,
-					inventory_item_id=inventory_id,
-					# shopify doesn't support fractional quantity
-					available=cint(d.actual_qty) - cint(d.reserved_qty),
+				data = client.execute(
+					INVENTORY_SET_QUANTITIES_MUTATION,
+					{
+						"input": {
+							"name": "available",
+							"reason": "correction",
+							"ignoreCompareQuantity": True,
+							"quantities": quantities,
+						}
+					},
 				)
-				update_inventory_sync_status(d.ecom_item, time=synced_on)
-				d.status = "Success"
-			except ResourceNotFound:
-				# Variant or location is deleted, mark as last synced and ignore.
-				update_inventory_sync_status(d.ecom_item, time=synced_on)
-				d.status = "Not Found"
+				user_errors = data["inventorySetQuantities"]["userErrors"]
 			except Exception as e:
-				d.status = "Failed"
-				d.failure_reason = str(e)
+				_set_status(batch, "Failed", str(e))
+				break
 
-			frappe.db.commit()
+			if not user_errors:
+				_set_status(batch, "Success")
+				break
+
+			failed = _map_inventory_user_errors(batch, user_errors)
+			if not failed:
+				# errors not related to any quantity fail the whole batch.
+				_set_status(batch, "Failed", ", ".join(error["message"] for error in user_errors))
+				break
+
+			batch = [d for i, d in enumerate(batch) if i not in failed]
+
+	rejected = [d for d in pending if d.inventory_item_rejected]
+	if rejected:
+		_refresh_inventory_item_ids(client, rejected)
+
+
+def _fetch_inventory_item_ids(client: ShopifyGraphQLClient, inventory_levels) -> None:
+	"""Fetch and save inventory item IDs which aren't saved on Ecommerce Items yet."""
+	missing = [d for d in inventory_levels if not d.inventory_item_id]
+
+	for batch, inventory_items in _get_variant_inventory_items(client, missing):
+		for d in batch:
+			d.inventory_item_id = inventory_items.get(get_gid("ProductVariant", d.variant_id))
+			if d.inventory_item_id:
+				_save_inventory_item_id(d.ecom_item, d.inventory_item_id)
+			else:
+				# Variant is deleted, mark as last synced and ignore.
+				d.status = "Not Found"
+
+
+def _refresh_inventory_item_ids(client: ShopifyGraphQLClient, inventory_levels) -> None:
+	"""Check inventory levels whose saved inventory item was rejected by Shopify.
+
+	Saved ID is updated only if variant has a different one, such levels are set again in next
+	sync. Otherwise the variant is deleted or not stocked at location and the level is ignored."""
+	for batch, inventory_items in _get_variant_inventory_items(client, inventory_levels):
+		for d in batch:
+			inventory_item_id = inventory_items.get(get_gid("ProductVariant", d.variant_id))
+			if inventory_item_id and inventory_item_id != d.inventory_item_id:
+				d.inventory_item_id = inventory_item_id
+				_save_inventory_item_id(d.ecom_item, d.inventory_item_id)
+			else:
+				d.status = "Not Found"
+
+
+def _get_variant_inventory_items(
+	client: ShopifyGraphQLClient, inventory_levels
+) -> Iterator[tuple[list, dict[str, str]]]:
+	"""Yield batches of inventory levels with variant GID -> inventory item ID of their variants.
+
+	Deleted variants are missing from the map, batches which can't be fetched are marked Failed."""
+	for batch in create_batch(inventory_levels, GRAPHQL_INVENTORY_BATCH_SIZE):
+		batch = list(batch)
+		variant_ids = list({get_gid("ProductVariant", d.variant_id) for d in batch})
+		try:
+			data = client.execute(
+				VARIANT_INVENTORY_ITEMS_QUERY, {"ids": variant_ids}, estimated_cost=len(variant_ids) * 2
+			)
+		except Exception as e:
+			_set_status(batch, "Failed", str(e))
+			continue
+
+		yield (
+			batch,
+			{
+				node["id"]: get_legacy_id(node["inventoryItem"]["id"])
+				for node in data.get("nodes") or []
+				if node and node.get("inventoryItem")
+			},
+		)
 
-		_log_inventory_update_status(inventory_sync_batch)
+
+def _map_inventory_user_errors(batch, user_errors) -> set[int]:
+	"""Set status of inventory levels using user errors and return their indexes in batch.
+
+	Field of user errors points to the quantity, e.g. ["input", "quantities", "3", "locationId"]"""
+	failed = set()
+	for error in user_errors:
+		field = error.get("field") or []
+		try:
+			idx = int(field[field.index("quantities") + 1])
+			d = batch[idx]
+		except (ValueError, IndexError):
+			continue
+
+		failed.add(idx)
+		d.failure_reason = error.get("message")
+		if error.get("code") == "INVALID_LOCATION":
+			# Location is deleted, mark as last synced and ignore.
+			d.status = "Not Found"
+		else:
+			d.status = "Failed"
+			if error.get("code") == "INVALID_INVENTORY_ITEM":
+				# saved inventory item id might be stale, checked after the batch is set.
+				d.inventory_item_rejected = True
+
+	return failed
+
+
+def _set_status(inventory_levels, status: str, failure_reason: str | None = None) -> None:
+	for d in inventory_levels:
+		d.status = status
+		d.failure_reason = failure_reason
+
+
+def _save_inventory_item_id(ecom_item: str, inventory_item_id: str) -> None:
+	frappe.db.set_value(
+		"Ecommerce Item", ecom_item, "inventory_item_id", inventory_item_id, update_modified=False
+	)
+
+
+@temp_shopify_session(priority=CallPriority.LOW)
+def backfill_inventory_item_ids() -> None:
+	"""Save inventory item ID of all variants linked to Ecommerce Items which don't have it.
+
+	Products are fetched in batches so a call is required for every `PRODUCT_FETCH_BATCH_SIZE`
+	products instead of a call per variant. Items which aren't backfilled (e.g. deleted
+	products) get their ID when their inventory is synced next time."""
+	ecom_items = frappe.get_all(
+		"Ecommerce Item",
+		filters={
+			"integration": MODULE_NAME,
+			"variant_id": ("is", "set"),
+			"inventory_item_id": ("is", "not set"),
+		},
+		fields=["name", "integration_item_code", "variant_id"],
+	)
+
+	variant_to_ecom_items = defaultdict(list)
+	for d in ecom_items:
+		variant_to_ecom_items[cstr(d.variant_id)].append(d.name)
+
+	product_ids = sorted({cstr(d.integration_item_code) for d in ecom_items})
+	for batch in create_batch(product_ids, PRODUCT_FETCH_BATCH_SIZE):
+		try:
+			products = Product.find(ids=",".join(batch), fields="id,variants", limit=PRODUCT_FETCH_BATCH_SIZE)
+		except Exception:
+			create_shopify_log(status="Error", method="backfill_inventory_item_ids", make_new=True)
+			continue
+
+		for product in products:
+			for variant in product.variants:
+				for ecom_item in variant_to_ecom_items.get(cstr(variant.id), []):
+					_save_inventory_item_id(ecom_item, cstr(variant.inventory_item_id))
+		frappe.db.commit()
 
 
 def _log_inventory_update_status(inventory_levels) -> None:
-	"""Create log of inventory update."""
+	"""Create log of inventory update, skipped inventory levels are only counted."""
+	skipped = sum(d.status == "Skipped" for d in inventory_levels)
+	inventory_levels = [d for d in inventory_levels if d.status != "Skipped"]
+	if not inventory_levels:
+		return
+
 	log_message = "variant_id,location_id,status,failure_reason\n"
 
 	log_message += "\n".join(
@@ -88,6 +446,9 @@ def _log_inventory_update_status(inventory_levels) -> None:
 	else:
 		status = "Success"
 
-	log_message = f"Updated {percent_successful * 100}% items\n\n" + log_message
+	log_message = (
+		f"Updated {percent_successful * 100}% items\n"
+		f"Pushed: {len(inventory_levels)}, Skipped (unchanged): {skipped}\n\n" + log_message
+	)
 
 	create_shopify_log(method="update_inventory_on_shopify", status=status, message=log_message)
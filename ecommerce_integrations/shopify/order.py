@@ -7,6 +7,10 @@ from frappe.utils import cint, cstr, flt, get_datetime, getdate, nowdate
 from shopify.collection import PaginatedIterator
 from shopify.resources import Order
 
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	buffered_logs,
+)
+from ecommerce_integrations.shopify.call_budget import CallPriority, call_priority
 from ecommerce_integrations.shopify.connection import temp_shopify_session
 from ecommerce_integrations.shopify.constants import (
 	CUSTOMER_ID_FIELD,
@@ -18,7 +22,11 @@ from ecommerce_integrations.shopify.constants import (
 	SETTING_DOCTYPE,
 )
 from ecommerce_integrations.shopify.customer import ShopifyCustomer
-from ecommerce_integrations.shopify.product import create_items_if_not_exist, get_item_code
+from ecommerce_integrations.shopify.product import (
+	create_items_if_not_exist,
+	get_item_codes,
+	get_item_key,
+)
 from ecommerce_integrations.shopify.utils import create_shopify_log
 from ecommerce_integrations.utils.price_list import get_dummy_price_list
 from ecommerce_integrations.utils.taxation import get_dummy_tax_category
@@ -29,6 +37,7 @@ DEFAULT_TAX_FIELDS = {
 }
 
 
+@call_priority(CallPriority.HIGH)
 def sync_sales_order(payload, request_id=None):
 	order = payload
 	frappe.set_user("Administrator")
@@ -140,6 +149,7 @@ def get_order_items(order_items, setting, delivery_date, taxes_inclusive):
 	items = []
 	all_product_exists = True
 	product_not_exists = []
+	item_codes = get_item_codes(order_items)
 
 	for shopify_item in order_items:
 		if not shopify_item.get("product_exists"):
@@ -150,7 +160,7 @@ def get_order_items(order_items, setting, delivery_date, taxes_inclusive):
 			continue
 
 		if all_product_exists:
-			item_code = get_item_code(shopify_item)
+			item_code = item_codes.get(get_item_key(shopify_item))
 			items.append(
 				{
 					"item_code": item_code,
@@ -196,9 +206,10 @@ def _get_total_discount(line_item) -> float:
 def get_order_taxes(shopify_order, setting, items):
 	taxes = []
 	line_items = shopify_order.get("line_items")
+	item_codes = get_item_codes(line_items)
 
 	for line_item in line_items:
-		item_code = get_item_code(line_item)
+		item_code = item_codes.get(get_item_key(line_item))
 		for tax in line_item.get("tax_lines"):
 			taxes.append(
 				{
@@ -400,7 +411,7 @@ def cancel_order(payload, request_id=None):
 		create_shopify_log(status="Success")
 
 
-@temp_shopify_session
+@temp_shopify_session(priority=CallPriority.HIGH)
 def sync_old_orders():
 	shopify_setting = frappe.get_cached_doc(SETTING_DOCTYPE)
 	if not cint(shopify_setting.sync_old_orders):
@@ -408,11 +419,14 @@ def sync_old_orders():
 
 	orders = _fetch_old_orders(shopify_setting.old_orders_from, shopify_setting.old_orders_to)
 
-	for order in orders:
-		log = create_shopify_log(
-			method=EVENT_MAPPER["orders/create"], request_data=json.dumps(order), make_new=True
-		)
-		sync_sales_order(order, request_id=log.name)
+	with buffered_logs():
+		for order in orders:
+			log = create_shopify_log(
+				method=EVENT_MAPPER["orders/create"], request_data=json.dumps(order), make_new=True
+			)
+			sync_sales_order(order, request_id=log.name)
+			# logs are buffered, commit synced order so that failure of next one doesn't roll it back.
+			frappe.db.commit()
 
 	shopify_setting = frappe.get_doc(SETTING_DOCTYPE)
 	shopify_setting.sync_old_orders = 0
@@ -5,6 +5,7 @@ from frappe.exceptions import UniqueValidationError
 from shopify.resources import Product
 
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
+from ecommerce_integrations.shopify.call_budget import CallPriority
 from ecommerce_integrations.shopify.connection import temp_shopify_session
 from ecommerce_integrations.shopify.constants import MODULE_NAME
 from ecommerce_integrations.shopify.product import ShopifyProduct
@@ -126,6 +127,7 @@ def import_all_products():
 	)
 
 
+@temp_shopify_session(priority=CallPriority.LOW)
 def queue_sync_all_products(*args, **kwargs):
 	start_time = process_time()
 
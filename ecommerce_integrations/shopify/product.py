@@ -73,6 +73,7 @@ class ShopifyProduct:
 
 		else:
 			product_dict["variant_id"] = product_dict["variants"][0]["id"]
+			product_dict["inventory_item_id"] = product_dict["variants"][0].get("inventory_item_id")
 			self._create_item(product_dict, warehouse)
 
 	def _create_attribute(self, product_dict):
@@ -141,10 +142,16 @@ class ShopifyProduct:
 
 		integration_item_code = product_dict["id"]  # shopify product_id
 		variant_id = product_dict.get("variant_id", "")  # shopify variant_id if has variants
+		inventory_item_id = product_dict.get("inventory_item_id")
 		sku = item_dict["sku"]
 
 		if not _match_sku_and_link_item(
-			item_dict, integration_item_code, variant_id, variant_of=variant_of, has_variant=has_variant
+			item_dict,
+			integration_item_code,
+			variant_id,
+			variant_of=variant_of,
+			has_variant=has_variant,
+			inventory_item_id=inventory_item_id,
 		):
 			ecommerce_item.create_ecommerce_item(
 				MODULE_NAME,
@@ -154,6 +161,7 @@ class ShopifyProduct:
 				sku=sku,
 				variant_of=variant_of,
 				has_variants=has_variant,
+				inventory_item_id=inventory_item_id,
 			)
 
 	def _create_item_variants(self, product_dict, warehouse, attributes):
@@ -166,6 +174,7 @@ class ShopifyProduct:
 				shopify_item_variant = {
 					"id": product_dict.get("id"),
 					"variant_id": variant.get("id"),
+					"inventory_item_id": variant.get("inventory_item_id"),
 					"item_code": variant.get("id"),
 					"title": product_dict.get("title", "").strip() + "-" + variant.get("title"),
 					"product_type": product_dict.get("product_type"),
@@ -271,7 +280,9 @@ def _get_item_image(product_dict):
 	return None
 
 
-def _match_sku_and_link_item(item_dict, product_id, variant_id, variant_of=None, has_variant=False) -> bool:
+def _match_sku_and_link_item(
+	item_dict, product_id, variant_id, variant_of=None, has_variant=False, inventory_item_id=None
+) -> bool:
 	"""Tries to match new item with existing item using Shopify SKU == item_code.
 
 	Returns true if matched and linked.
@@ -291,6 +302,7 @@ def _match_sku_and_link_item(item_dict, product_id, variant_id, variant_of=None,
 					"integration_item_code": product_id,
 					"has_variants": 0,
 					"variant_id": cstr(variant_id),
+					"inventory_item_id": cstr(inventory_item_id),
 					"sku": sku,
 				}
 			)
@@ -328,6 +340,17 @@ def get_item_code(shopify_item):
 		return item.item_code
 
 
+def get_item_codes(shopify_items) -> dict[ecommerce_item.ItemKey, str | None]:
+	"""Get item codes of multiple shopify_item dicts using a single query.
+
+	Use `get_item_key` to find item code of a shopify_item in returned map."""
+	return ecommerce_item.get_erpnext_item_codes(MODULE_NAME, [get_item_key(item) for item in shopify_items])
+
+
+def get_item_key(shopify_item) -> ecommerce_item.ItemKey:
+	return (shopify_item.get("product_id"), shopify_item.get("variant_id"), shopify_item.get("sku"))
+
+
 @temp_shopify_session
 def upload_erpnext_item(doc, method=None):
 	"""This hook is called when inserting new or updating existing `Item`.
@@ -414,6 +437,7 @@ def upload_erpnext_item(doc, method=None):
 			product.save()  # push variant
 
 			ecom_items = list(set([item, template_item]))
+			variant = product.variants[0]
 			for d in ecom_items:
 				ecom_item = frappe.get_doc(
 					{
@@ -421,8 +445,9 @@ def upload_erpnext_item(doc, method=None):
 						"erpnext_item_code": d.name,
 						"integration": MODULE_NAME,
 						"integration_item_code": str(product.id),
-						"variant_id": "" if d.has_variants else str(product.variants[0].id),
-						"sku": "" if d.has_variants else str(product.variants[0].sku),
+						"variant_id": "" if d.has_variants else str(variant.id),
+						"inventory_item_id": "" if d.has_variants else cstr(variant.inventory_item_id),
+						"sku": "" if d.has_variants else str(variant.sku),
 						"has_variants": d.has_variants,
 						"variant_of": d.variant_of,
 					}
@@ -491,6 +516,7 @@ def map_erpnext_variant_to_shopify_variant(shopify_product: Product, erpnext_ite
 							"integration": MODULE_NAME,
 							"integration_item_code": str(shopify_product.id),
 							"variant_id": variant_product_id,
+							"inventory_item_id": cstr(variant.inventory_item_id),
 							"sku": str(variant.sku),
 							"variant_of": erpnext_item.variant_of,
 						}
@@ -9,6 +9,13 @@ from shopify.resources import Webhook
 from shopify.session import Session
 
 from ecommerce_integrations.shopify import connection
+from ecommerce_integrations.shopify.call_budget import (
+	CALL_BUDGET_CACHE_KEY,
+	CallPriority,
+	call_priority,
+	get_call_budget,
+	record_call_limit,
+)
 from ecommerce_integrations.shopify.constants import API_VERSION, SETTING_DOCTYPE
 
 
@@ -37,3 +44,24 @@ class TestShopifyConnection(IntegrationTestCase):
 		with Session.temp(self.setting.shopify_url, API_VERSION, self.setting.get_password("password")):
 			for wh in Webhook.find():
 				self.assertNotEqual(wh.address, callback_url)
+
+	def test_call_budget_from_headers(self):
+		self.addCleanup(frappe.cache.delete_value, CALL_BUDGET_CACHE_KEY)
+
+		record_call_limit({"x-shopify-shop-api-call-limit": "32/40"})
+		used, limit = get_call_budget()
+
+		self.assertEqual(limit, 40)
+		self.assertLessEqual(used, 32)
+		self.assertGreater(used, 30)
+
+		record_call_limit({"Content-Type": "application/json"})
+		self.assertEqual(get_call_budget()[1], 40)
+
+	def test_call_priority(self):
+		@call_priority(CallPriority.HIGH)
+		def sync():
+			return frappe.flags.shopify_api_priority
+
+		self.assertEqual(sync(), CallPriority.HIGH)
+		self.assertIsNone(frappe.flags.shopify_api_priority)
@@ -0,0 +1,159 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar
+
+import frappe
+
+from ecommerce_integrations.shopify.graphql import ShopifyGraphQLClient, get_cost_budget
+from ecommerce_integrations.shopify.inventory import _set_inventory_levels_graphql
+
+from .utils import TestCase
+
+THROTTLE_STATUS = {"maximumAvailable": 2000.0, "currentlyAvailable": 1990, "restoreRate": 100.0}
+
+
+class GraphQLStub(BaseHTTPRequestHandler):
+	"""Local GraphQL server which responds with queued responses and records requests."""
+
+	responses: ClassVar[list[dict]] = []
+	requests: ClassVar[list[dict]] = []
+
+	def do_POST(self):
+		body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+		self.requests.append(body)
+
+		response = self.responses.pop(0)
+		status = response.pop("status", 200)
+		response["extensions"] = {"cost": {"requestedQueryCost": 10, "throttleStatus": THROTTLE_STATUS}}
+
+		self.send_response(status)
+		if status == 429:
+			self.send_header("Retry-After", "0.1")
+		self.send_header("Content-Type", "application/json")
+		self.end_headers()
+		self.wfile.write(json.dumps(response).encode())
+
+	def log_message(self, *args):
+		pass
+
+
+class TestInventory(TestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.server = ThreadingHTTPServer(("127.0.0.1", 0), GraphQLStub)
+		threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.server.shutdown()
+		super().tearDownClass()
+
+	def setUp(self):
+		super().setUp()
+		GraphQLStub.responses.clear()
+		GraphQLStub.requests.clear()
+		self.client = ShopifyGraphQLClient(
+			endpoint=f"http://127.0.0.1:{self.server.server_port}/graphql.json", headers={}
+		)
+
+	def test_graphql_inventory_sync(self):
+		"""requirement: quantities are set in batch and user errors are mapped to inventory levels"""
+		inventory_levels = [
+			frappe._dict(ecom_item="A", inventory_item_id="1", shopify_location_id="10", available=5),
+			frappe._dict(ecom_item="B", inventory_item_id="2", shopify_location_id="20", available=3),
+			frappe._dict(ecom_item="C", inventory_item_id="3", shopify_location_id="10", available=0),
+		]
+		location_error = {
+			"field": ["input", "quantities", "1", "locationId"],
+			"message": "The specified location could not be found.",
+			"code": "INVALID_LOCATION",
+		}
+		GraphQLStub.responses.extend(
+			[
+				{"data": {"inventorySetQuantities": {"userErrors": [location_error]}}},
+				{"data": {"inventorySetQuantities": {"userErrors": []}}},
+			]
+		)
+
+		_set_inventory_levels_graphql(inventory_levels, client=self.client)
+
+		self.assertEqual([d.status for d in inventory_levels], ["Success", "Not Found", "Success"])
+		self.assertEqual(inventory_levels[1].failure_reason, location_error["message"])
+
+		first_request, retry = (r["variables"]["input"]["quantities"] for r in GraphQLStub.requests)
+		self.assertEqual(len(first_request), 3)
+		self.assertEqual(
+			[q["inventoryItemId"] for q in retry],
+			["gid://shopify/InventoryItem/1", "gid://shopify/InventoryItem/3"],
+		)
+
+		_, maximum, restore_rate = get_cost_budget()
+		self.assertEqual((maximum, restore_rate), (2000.0, 100.0))
+
+	def test_graphql_rejected_inventory_item(self):
+		"""requirement: rejected inventory item ID is replaced only if variant has a different one"""
+		inventory_levels = [
+			frappe._dict(
+				ecom_item="A", variant_id="11", inventory_item_id="1", shopify_location_id="10", available=5
+			),
+			frappe._dict(
+				ecom_item="B", variant_id="22", inventory_item_id="2", shopify_location_id="10", available=3
+			),
+		]
+		item_errors = [
+			{
+				"field": ["input", "quantities", str(i), "inventoryItemId"],
+				"message": "The specified inventory item could not be found.",
+				"code": "INVALID_INVENTORY_ITEM",
+			}
+			for i in range(2)
+		]
+		variants = [
+			{
+				"id": "gid://shopify/ProductVariant/11",
+				"inventoryItem": {"id": "gid://shopify/InventoryItem/1"},
+			},
+			{
+				"id": "gid://shopify/ProductVariant/22",
+				"inventoryItem": {"id": "gid://shopify/InventoryItem/99"},
+			},
+		]
+		GraphQLStub.responses.extend(
+			[
+				{"data": {"inventorySetQuantities": {"userErrors": item_errors}}},
+				{"data": {"nodes": variants}},
+			]
+		)
+
+		_set_inventory_levels_graphql(inventory_levels, client=self.client)
+
+		self.assertEqual([d.status for d in inventory_levels], ["Not Found", "Failed"])
+		self.assertEqual([d.inventory_item_id for d in inventory_levels], ["1", "99"])
+
+	def test_graphql_throttled_query_is_retried(self):
+		GraphQLStub.responses.extend(
+			[
+				{"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}]},
+				{"data": {"inventorySetQuantities": {"userErrors": []}}},
+			]
+		)
+
+		data = self.client.execute("mutation { inventorySetQuantities }")
+
+		self.assertEqual(data, {"inventorySetQuantities": {"userErrors": []}})
+		self.assertEqual(len(GraphQLStub.requests), 2)
+
+	def test_graphql_rate_limited_request_is_retried(self):
+		GraphQLStub.responses.extend(
+			[
+				{"status": 429, "errors": [{"message": "Too Many Requests"}]},
+				{"data": {"inventorySetQuantities": {"userErrors": []}}},
+			]
+		)
+
+		data = self.client.execute("mutation { inventorySetQuantities }")
+
+		self.assertEqual(data, {"inventorySetQuantities": {"userErrors": []}})
+		self.assertEqual(len(GraphQLStub.requests), 2)
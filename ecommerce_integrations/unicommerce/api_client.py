@@ -1,4 +1,5 @@
 import base64
+import os
 from typing import Any
 
 import frappe
@@ -6,12 +7,23 @@ import requests
 from frappe import _
 from frappe.utils import cint, cstr, get_datetime
 from pytz import timezone
+from requests.adapters import HTTPAdapter
 
 from ecommerce_integrations.unicommerce.constants import SETTINGS_DOCTYPE
 from ecommerce_integrations.unicommerce.utils import create_unicommerce_log
 
 JsonDict = dict[str, Any]
 
+# Number of keep-alive connections kept open per host, can be overridden from site config
+# using `unicommerce_http_pool_size`.
+DEFAULT_POOL_SIZE = 10
+# (connect, read) timeout in seconds, can be overridden per call.
+DEFAULT_TIMEOUT = (10, 120)
+
+# Session is shared by all clients in a worker process, see `get_session`.
+_session: requests.Session | None = None
+_session_pid: int | None = None
+
 
 class UnicommerceAPIClient:
 	"""Wrapper around Unicommerce REST API
@@ -23,17 +35,19 @@ class UnicommerceAPIClient:
 		self,
 		url: str | None = None,
 		access_token: str | None = None,
+		timeout: float | tuple[float, float] | None = None,
 	):
 		self.settings = frappe.get_doc(SETTINGS_DOCTYPE)
 		self.base_url = url or f"https://{self.settings.unicommerce_site}"
 		self.access_token = access_token
+		self.timeout = timeout or DEFAULT_TIMEOUT
+		self.session = get_session()
 		self.__initialize_auth()
 
 	def __initialize_auth(self):
 		"""Initialize and setup authentication details"""
 		if not self.access_token:
-			self.settings.renew_tokens()
-			self.access_token = self.settings.get_password("access_token")
+			self.access_token = self.settings.get_access_token()
 
 		self._auth_headers = {"Authorization": f"Bearer {self.access_token}"}
 
@@ -46,6 +60,7 @@ class UnicommerceAPIClient:
 		params: JsonDict | None = None,
 		files: JsonDict | None = None,
 		log_error=True,
+		timeout: float | tuple[float, float] | None = None,
 	) -> tuple[JsonDict, bool]:
 		if headers is None:
 			headers = {}
@@ -55,8 +70,14 @@ class UnicommerceAPIClient:
 		url = self.base_url + endpoint
 
 		try:
-			response = requests.request(
-				url=url, method=method, headers=headers, json=body, params=params, files=files
+			response = self.session.request(
+				url=url,
+				method=method,
+				headers=headers,
+				json=body,
+				params=params,
+				files=files,
+				timeout=timeout or self.timeout,
 			)
 			# unicommerce gives useful info in response text, show it in error logs
 			response.reason = cstr(response.reason) + cstr(response.text)
@@ -72,7 +93,7 @@ class UnicommerceAPIClient:
 		data = frappe._dict(response.json())
 		status = data.successful if data.successful is not None else True
 
-		if not status:
+		if not status and log_error:
 			req = response.request
 			url = f"URL: {req.url}"
 			body = f"body:  {req.body.decode('utf-8')}"
@@ -107,14 +128,14 @@ class UnicommerceAPIClient:
 			endpoint = "/services/rest/v1/catalog/itemType/edit"
 		return self.request(endpoint=endpoint, body={"itemType": item_dict})
 
-	def get_sales_order(self, order_code: str) -> JsonDict | None:
+	def get_sales_order(self, order_code: str, log_error=True) -> JsonDict | None:
 		"""Get details for a sales order.
 
 		ref: https://documentation.unicommerce.com/docs/saleorder-get.html
 		"""
 
 		order, status = self.request(
-			endpoint="/services/rest/v1/oms/saleorder/get", body={"code": order_code}
+			endpoint="/services/rest/v1/oms/saleorder/get", body={"code": order_code}, log_error=log_error
 		)
 		if status and "saleOrderDTO" in order:
 			return order["saleOrderDTO"]
@@ -170,7 +191,7 @@ class UnicommerceAPIClient:
 		if status:
 			return response
 
-	def bulk_inventory_update(self, facility_code: str, inventory_map: dict[str, int]):
+	def bulk_inventory_update(self, facility_code: str, inventory_map: dict[str, int], log_error=True):
 		"""Bulk update inventory on unicommerce using SKU and qty.
 
 		The qty should be "total" quantity.
@@ -196,6 +217,7 @@ class UnicommerceAPIClient:
 			endpoint="/services/rest/v1/inventory/adjust/bulk",
 			headers=extra_headers,
 			body={"inventoryAdjustments": inventory_adjustments},
+			log_error=log_error,
 		)
 
 		if not status:
@@ -208,7 +230,7 @@ class UnicommerceAPIClient:
 					item["facilityInventoryAdjustment"]["itemSKU"]: item["successful"]
 					for item in item_wise_response
 				}
-				if False in item_wise_status.values():
+				if log_error and False in item_wise_status.values():
 					create_unicommerce_log(
 						status="Failure",
 						response_data=response,
@@ -458,6 +480,48 @@ class UnicommerceAPIClient:
 		return response
 
 
+def get_session() -> requests.Session:
+	"""Get keep-alive HTTP session for current worker process.
+
+	Connections are pooled per host and reused across requests and clients, this avoids
+	TCP+TLS handshake on every API call. A new session is created after fork as
+	sockets can not be shared between processes."""
+	global _session, _session_pid
+
+	if _session is None or _session_pid != os.getpid():
+		pool_size = cint(frappe.conf.get("unicommerce_http_pool_size")) or DEFAULT_POOL_SIZE
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+		session = requests.Session()
+		session.mount("https://", adapter)
+		session.mount("http://", adapter)
+
+		_session, _session_pid = session, os.getpid()
+
+	return _session
+
+
+def get_connection_stats() -> dict[str, int]:
+	"""Get connection reuse stats of current worker's session.
+
+	returns: dict containing number of requests, new connections and reused connections."""
+	stats = {"requests": 0, "connections": 0, "reused": 0}
+	if _session is None or _session_pid != os.getpid():
+		return stats
+
+	adapter = _session.get_adapter("https://")
+	pools = adapter.poolmanager.pools
+	for key in pools.keys():
+		pool = pools.get(key)
+		if pool is None:
+			continue
+		stats["requests"] += pool.num_requests
+		stats["connections"] += pool.num_connections
+
+	stats["reused"] = max(stats["requests"] - stats["connections"], 0)
+	return stats
+
+
 def _utc_timeformat(datetime) -> str:
 	"""Get datetime in UTC/GMT as required by Unicommerce"""
 	return get_datetime(datetime).astimezone(timezone("UTC")).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -5,11 +5,18 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 
+from ecommerce_integrations.unicommerce.utils import clear_search_watermarks
+
 
 class UnicommerceChannel(Document):
 	def validate(self):
 		self.__check_compnay()
 
+	def on_update(self):
+		# orders of newly enabled channel are searched again over full window.
+		if self.has_value_changed("enabled"):
+			clear_search_watermarks()
+
 	def __check_compnay(self):
 		company_fields = {
 			"warehouse": "Warehouse",
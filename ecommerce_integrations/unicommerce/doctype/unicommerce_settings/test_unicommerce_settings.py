@@ -1,6 +1,8 @@
 # Copyright (c) 2021, Frappe and Contributors
 # See LICENSE
 
+from unittest.mock import patch
+
 import frappe
 import responses
 from frappe.utils import now, now_datetime
@@ -68,3 +70,16 @@ class TestUnicommerceSettings(TestCase):
 		self.assertEqual(self.settings.token_type, "bearer")
 		self.assertTrue(str(self.settings.expires_on) > now())
 		self.assertTrue(responses.assert_call_count(url, 1))
+
+	def test_cached_access_token(self):
+		"""requirement: Valid access token is served from cache without renewing or saving settings."""
+		from ecommerce_integrations.unicommerce.doctype.unicommerce_settings.unicommerce_settings import (
+			ACCESS_TOKEN_CACHE_KEY,
+		)
+
+		frappe.cache.set_value(ACCESS_TOKEN_CACHE_KEY, "CACHED_TOKEN", expires_in_sec=60)
+		self.addCleanup(frappe.cache.delete_value, ACCESS_TOKEN_CACHE_KEY)
+
+		with patch.object(self.settings, "renew_tokens") as renew_tokens:
+			self.assertEqual(self.settings.get_access_token(), "CACHED_TOKEN")
+			renew_tokens.assert_not_called()
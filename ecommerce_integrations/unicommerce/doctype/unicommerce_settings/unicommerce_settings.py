@@ -6,7 +6,7 @@ import frappe
 import requests
 from frappe import _
 from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
-from frappe.utils import add_to_date, get_datetime, now_datetime
+from frappe.utils import add_to_date, cint, get_datetime, now_datetime
 
 from ecommerce_integrations.controllers.setting import (
 	ERPNextWarehouse,
@@ -43,7 +43,15 @@ from ecommerce_integrations.unicommerce.constants import (
 	TRACKING_CODE_FIELD,
 	UNICOMMERCE_SHIPPING_ID,
 )
-from ecommerce_integrations.unicommerce.utils import create_unicommerce_log
+from ecommerce_integrations.unicommerce.utils import clear_search_watermarks, create_unicommerce_log
+
+ACCESS_TOKEN_CACHE_KEY = "unicommerce_access_token"
+TOKEN_REFRESH_LOCK = "unicommerce_token_refresh"
+# renew tokens slightly before actual expiry so in-flight requests don't fail.
+TOKEN_EXPIRY_MARGIN = 60  # seconds
+TOKEN_REFRESH_LOCK_TIMEOUT = 60  # seconds
+# settings which change what is searched, incremental search watermarks are cleared when these change.
+SEARCH_SETTINGS_FIELDS = ("only_sync_completed_orders", "order_status_days")
 
 
 class UnicommerceSettings(SettingController):
@@ -71,13 +79,65 @@ class UnicommerceSettings(SettingController):
 		if not self.flags.ignore_custom_fields:
 			setup_custom_fields(update=False)
 
+	def on_update(self):
+		# credentials or tokens might have changed, cached token is re-populated on next use.
+		frappe.cache.delete_value(ACCESS_TOKEN_CACHE_KEY)
+		# searches of newly configured windows or facilities should cover full window.
+		if self._search_settings_changed():
+			clear_search_watermarks()
+
+	def _search_settings_changed(self) -> bool:
+		previous = self.get_doc_before_save()
+		if not previous:
+			return True
+
+		return any(self.has_value_changed(field) for field in SEARCH_SETTINGS_FIELDS) or (
+			previous.get_erpnext_to_integration_wh_mapping() != self.get_erpnext_to_integration_wh_mapping()
+		)
+
+	def get_access_token(self) -> str:
+		"""Get a valid access token.
+
+		Token is cached in redis till it expires and shared by all workers. When it expires only
+		one worker renews it, others wait for the renewed token instead of renewing it again."""
+		if token := frappe.cache.get_value(ACCESS_TOKEN_CACHE_KEY):
+			return token
+
+		lock = frappe.cache.lock(
+			frappe.cache.make_key(TOKEN_REFRESH_LOCK),
+			timeout=TOKEN_REFRESH_LOCK_TIMEOUT,
+			blocking_timeout=TOKEN_REFRESH_LOCK_TIMEOUT,
+		)
+		with lock:
+			# token might have been renewed by another worker while waiting for lock.
+			if token := frappe.cache.get_value(ACCESS_TOKEN_CACHE_KEY):
+				return token
+
+			self.load_from_db()
+			self.renew_tokens()
+			token = self.get_password("access_token")
+			self._cache_access_token(token)
+
+		return token
+
+	def _cache_access_token(self, token: str) -> None:
+		ttl = cint((get_datetime(self.expires_on) - now_datetime()).total_seconds()) - TOKEN_EXPIRY_MARGIN
+		if token and ttl > 0:
+			frappe.cache.set_value(ACCESS_TOKEN_CACHE_KEY, token, expires_in_sec=ttl)
+
 	def renew_tokens(self, save=True):
-		if now_datetime() >= get_datetime(self.expires_on):
-			try:
-				self.update_tokens()
-			except Exception as e:
-				create_unicommerce_log(status="Error", message="Failed to authenticate with Unicommerce")
-				raise e
+		"""Renew tokens if they are about to expire.
+
+		Settings are only saved if tokens are actually renewed."""
+		if now_datetime() < add_to_date(get_datetime(self.expires_on), seconds=-TOKEN_EXPIRY_MARGIN):
+			return
+
+		try:
+			self.update_tokens()
+		except Exception as e:
+			create_unicommerce_log(status="Error", message="Failed to authenticate with Unicommerce")
+			raise e
+
 		if save:
 			self.flags.ignore_custom_fields = True
 			self.flags.ignore_permissions = True
@@ -1,20 +1,32 @@
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 import frappe
 from frappe.utils import cint, now
+from frappe.utils.nestedset import get_descendants_of
 
 from ecommerce_integrations.controllers.inventory import (
-	get_inventory_levels,
-	get_inventory_levels_of_group_warehouse,
-	update_inventory_sync_status,
+	bulk_update_inventory_sync_status,
+	get_inventory_level_pages,
+	get_inventory_level_pages_of_group_warehouse,
+	get_pushed_quantities,
+	get_stock_changes,
+	mark_inventory_dirty,
+	needs_full_inventory_sync,
+	pop_dirty_inventory,
+	record_pushed_quantities,
+	set_full_inventory_synced,
 )
 from ecommerce_integrations.controllers.scheduling import need_to_run
 from ecommerce_integrations.unicommerce.api_client import UnicommerceAPIClient
 from ecommerce_integrations.unicommerce.constants import MODULE_NAME, SETTINGS_DOCTYPE
+from ecommerce_integrations.unicommerce.utils import create_unicommerce_log
 
 # Note: Undocumented but currently handles ~1000 inventory changes in one request.
-# Remaining to be done in next interval.
+# Larger backlogs are pushed in multiple requests.
 MAX_INVENTORY_UPDATE_IN_REQUEST = 1000
+DEFAULT_INVENTORY_SYNC_CONCURRENCY = 2
 
 
 def update_inventory_on_unicommerce(client=None, force=False):
@@ -23,7 +35,16 @@ def update_inventory_on_unicommerce(client=None, force=False):
 	This function gets called by scheduler every minute. The function
 	decides whether to run or not based on configured sync frequency.
 
-	force=True ignores the set frequency.
+	Only stock changed since last run (see `mark_inventory_dirty_on_stock_change`) is synced,
+	all changed Bins are synced periodically to pick up changes missed by doc events.
+
+	Items with same quantity as last pushed to a facility are skipped. Remaining items are pushed
+	in chunks of `MAX_INVENTORY_UPDATE_IN_REQUEST`, chunks of different facilities are pushed in
+	parallel and failure of a chunk doesn't affect others.
+
+	force=True ignores the set frequency, syncs all changed Bins and doesn't skip any item.
+
+	returns: _dict with count of pushed and skipped inventory levels and result of each chunk.
 	"""
 	settings = frappe.get_cached_doc(SETTINGS_DOCTYPE)
 
@@ -37,6 +58,7 @@ def update_inventory_on_unicommerce(client=None, force=False):
 	# get configured warehouses
 	warehouses = settings.get_erpnext_warehouses()
 	wh_to_facility_map = settings.get_erpnext_to_integration_wh_mapping()
+	concurrency = cint(settings.inventory_sync_concurrency) or DEFAULT_INVENTORY_SYNC_CONCURRENCY
 
 	if client is None:
 		client = UnicommerceAPIClient()
@@ -45,41 +67,204 @@ def update_inventory_on_unicommerce(client=None, force=False):
 	success_map: dict[str, bool] = defaultdict(lambda: True)
 	inventory_synced_on = now()
 
-	for warehouse in warehouses:
-		is_group_warehouse = cint(frappe.db.get_value("Warehouse", warehouse, "is_group"))
+	# only changed stock is synced, all Bins are checked periodically to find missed changes.
+	full_sync = force or needs_full_inventory_sync(MODULE_NAME)
+	dirty_inventory = pop_dirty_inventory(MODULE_NAME)
+	# stock changes which are not synced in this run
+	pending_changes = set()
+	stats = frappe._dict(pushed=0, skipped=0, chunks=[])
 
-		if is_group_warehouse:
-			erpnext_inventory = get_inventory_levels_of_group_warehouse(
-				warehouse=warehouse, integration=MODULE_NAME
+	try:
+		chunks = _get_inventory_chunks(
+			warehouses,
+			wh_to_facility_map,
+			dirty_inventory=None if full_sync else dirty_inventory,
+			skip_unchanged=not force,
+			success_map=success_map,
+			stats=stats,
+		)
+		for chunk, response, status in _push_inventory_chunks(client, chunks, concurrency):
+			item_wise_status = response if status else {}
+			_log_chunk_failure(chunk, response, status)
+
+			record_pushed_quantities(
+				MODULE_NAME,
+				{
+					(d.ecom_item, chunk.facility_code): chunk.inventory_map[d.integration_item_code]
+					for d in chunk.inventory
+					if item_wise_status.get(d.integration_item_code)
+				},
 			)
-		else:
-			erpnext_inventory = get_inventory_levels(warehouses=(warehouse,), integration=MODULE_NAME)
+			for d in chunk.inventory:
+				item_status = bool(item_wise_status.get(d.integration_item_code))
+				# Any one warehouse sync failure should be considered failure
+				success_map[d.ecom_item] = success_map[d.ecom_item] and item_status
+				if not item_status:
+					pending_changes.add((d.item_code, chunk.warehouse))
+
+			pushed = sum(bool(item_wise_status.get(sku)) for sku in chunk.inventory_map)
+			stats.pushed += pushed
+			stats.chunks.append(
+				{
+					"facility_code": chunk.facility_code,
+					"chunk": chunk.idx,
+					"items": len(chunk.inventory_map),
+					"successful": bool(status),
+					"failed_items": len(chunk.inventory_map) - pushed,
+				}
+			)
+	except Exception:
+		mark_inventory_dirty(MODULE_NAME, dirty_inventory, on_commit=False)
+		raise
+
+	_update_inventory_sync_status(success_map, inventory_synced_on)
+	mark_inventory_dirty(MODULE_NAME, pending_changes, on_commit=False)
+	if full_sync:
+		set_full_inventory_synced(MODULE_NAME)
+
+	return stats
+
 
-		if not erpnext_inventory:
-			continue
+def _get_inventory_chunks(
+	warehouses, wh_to_facility_map, dirty_inventory, skip_unchanged, success_map, stats
+) -> Iterator[frappe._dict]:
+	"""Yield changed inventory of all warehouses in chunks of `MAX_INVENTORY_UPDATE_IN_REQUEST`.
 
-		erpnext_inventory = erpnext_inventory[:MAX_INVENTORY_UPDATE_IN_REQUEST]
+	Chunks of warehouses are interleaved so that requests for different facilities are in
+	flight together, only the current page of each warehouse is held in memory."""
+	warehouse_pages = {wh: _get_inventory_pages(wh, dirty_inventory) for wh in warehouses}
+	chunk_count = Counter()
 
-		# TODO: consider reserved qty on both platforms.
-		inventory_map = {d.integration_item_code: cint(d.actual_qty) for d in erpnext_inventory}
-		facility_code = wh_to_facility_map[warehouse]
+	while warehouse_pages:
+		for warehouse, pages in list(warehouse_pages.items()):
+			erpnext_inventory = next(pages, None)
+			if erpnext_inventory is None:
+				del warehouse_pages[warehouse]
+				continue
+
+			facility_code = wh_to_facility_map[warehouse]
+			if skip_unchanged:
+				erpnext_inventory = _skip_unchanged_inventory(
+					erpnext_inventory, facility_code, success_map, stats
+				)
+				if not erpnext_inventory:
+					continue
+
+			chunk_count[warehouse] += 1
+			yield frappe._dict(
+				idx=chunk_count[warehouse],
+				warehouse=warehouse,
+				facility_code=facility_code,
+				inventory=erpnext_inventory,
+				# TODO: consider reserved qty on both platforms.
+				inventory_map={d.integration_item_code: cint(d.actual_qty) for d in erpnext_inventory},
+			)
+
+
+def _get_inventory_pages(warehouse, dirty_inventory=None) -> Iterator[list[frappe._dict]]:
+	"""Get pages of changed inventory of a warehouse.
+
+	If `dirty_inventory` is specified then only items changed in warehouse (or its children
+	in case of group warehouse) are considered."""
+	is_group_warehouse = cint(frappe.db.get_value("Warehouse", warehouse, "is_group"))
+
+	item_codes = None
+	if dirty_inventory is not None:
+		warehouse_tree = {warehouse}
+		if is_group_warehouse:
+			warehouse_tree.update(get_descendants_of("Warehouse", warehouse))
+		item_codes = {item_code for item_code, wh in dirty_inventory if wh in warehouse_tree}
+		if not item_codes:
+			return iter(())
 
-		response, status = client.bulk_inventory_update(
-			facility_code=facility_code, inventory_map=inventory_map
+	if is_group_warehouse:
+		return get_inventory_level_pages_of_group_warehouse(
+			warehouse=warehouse,
+			integration=MODULE_NAME,
+			page_size=MAX_INVENTORY_UPDATE_IN_REQUEST,
+			item_codes=item_codes,
 		)
 
-		if status:
-			# update success_map
-			sku_to_ecom_item_map = {d.integration_item_code: d.ecom_item for d in erpnext_inventory}
-			for sku, status in response.items():
-				ecom_item = sku_to_ecom_item_map[sku]
-				# Any one warehouse sync failure should be considered failure
-				success_map[ecom_item] = success_map[ecom_item] and status
+	return get_inventory_level_pages(
+		warehouses=(warehouse,),
+		integration=MODULE_NAME,
+		page_size=MAX_INVENTORY_UPDATE_IN_REQUEST,
+		item_codes=item_codes,
+	)
 
-	_update_inventory_sync_status(success_map, inventory_synced_on)
+
+def _push_inventory_chunks(
+	client: UnicommerceAPIClient, chunks: Iterable[frappe._dict], concurrency: int
+) -> Iterator[tuple[frappe._dict, dict | None, bool]]:
+	"""Push inventory chunks using a bounded thread pool and yield (chunk, response, status).
+
+	Threads only make HTTP requests, results are processed and logged in main thread."""
+
+	def push(chunk):
+		try:
+			return client.bulk_inventory_update(
+				facility_code=chunk.facility_code, inventory_map=chunk.inventory_map, log_error=False
+			)
+		except Exception:
+			return None, False
+
+	with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+		pending = deque()
+		for chunk in chunks:
+			pending.append((chunk, executor.submit(push, chunk)))
+			# don't generate more than two rounds of chunks ahead of requests.
+			if len(pending) >= concurrency * 2:
+				chunk, future = pending.popleft()
+				yield chunk, *future.result()
+
+		while pending:
+			chunk, future = pending.popleft()
+			yield chunk, *future.result()
+
+
+def _log_chunk_failure(chunk, response, status) -> None:
+	if status and all(response.values()):
+		return
+
+	failed = "some items in chunk" if status else "chunk"
+	message = f"Inventory sync failed for {failed} {chunk.idx} of facility {chunk.facility_code}"
+
+	create_unicommerce_log(
+		status="Failure" if status else "Error",
+		method="update_inventory_on_unicommerce",
+		request_data=chunk.inventory_map,
+		response_data=response,
+		message=message,
+		make_new=True,
+	)
+
+
+def _skip_unchanged_inventory(erpnext_inventory, facility_code, success_map, stats):
+	"""Remove inventory levels with same quantity as last pushed to facility.
+
+	Skipped items are considered synced."""
+	pushed_quantities = get_pushed_quantities(
+		MODULE_NAME, [(d.ecom_item, facility_code) for d in erpnext_inventory]
+	)
+
+	changed_inventory = []
+	for d in erpnext_inventory:
+		if pushed_quantities.get((d.ecom_item, facility_code)) == cint(d.actual_qty):
+			success_map.setdefault(d.ecom_item, True)
+			stats.skipped += 1
+		else:
+			changed_inventory.append(d)
+
+	return changed_inventory
+
+
+def mark_inventory_dirty_on_stock_change(doc, method=None) -> None:
+	"""Track stock changes so that only changed inventory is synced, see `get_stock_changes`."""
+	settings = frappe.get_cached_doc(SETTINGS_DOCTYPE)
+	if settings.is_enabled() and settings.enable_inventory_sync:
+		mark_inventory_dirty(MODULE_NAME, get_stock_changes(doc))
 
 
 def _update_inventory_sync_status(ecom_item_success_map: dict[str, bool], timestamp: str) -> None:
-	for ecom_item, status in ecom_item_success_map.items():
-		if status:
-			update_inventory_sync_status(ecom_item, timestamp)
+	synced_items = [ecom_item for ecom_item, status in ecom_item_success_map.items() if status]
+	bulk_update_inventory_sync_status(synced_items, timestamp)
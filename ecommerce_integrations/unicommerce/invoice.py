@@ -10,7 +10,6 @@ from frappe import _
 from frappe.utils import cint, flt, nowdate
 from frappe.utils.file_manager import save_file
 
-from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
 from ecommerce_integrations.unicommerce.api_client import UnicommerceAPIClient
 from ecommerce_integrations.unicommerce.constants import (
 	CHANNEL_ID_FIELD,
@@ -27,7 +26,7 @@ from ecommerce_integrations.unicommerce.constants import (
 	SHIPPING_PROVIDER_CODE,
 	TRACKING_CODE_FIELD,
 )
-from ecommerce_integrations.unicommerce.order import get_taxes
+from ecommerce_integrations.unicommerce.order import get_item_codes, get_taxes
 from ecommerce_integrations.unicommerce.utils import (
 	create_unicommerce_log,
 	get_unicommerce_date,
@@ -448,10 +447,9 @@ def _get_line_items(
 	"""Invoice items can be different and are consolidated, hence recomputing is required"""
 
 	si_items = []
+	item_codes = get_item_codes(line_items)
 	for item in line_items:
-		item_code = ecommerce_item.get_erpnext_item_code(
-			integration=MODULE_NAME, integration_item_code=item["itemSku"]
-		)
+		item_code = item_codes.get(item["itemSku"])
 		for __ in range(cint(item["quantity"])):
 			si_items.append(
 				{
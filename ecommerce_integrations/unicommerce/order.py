@@ -1,14 +1,19 @@
 import json
-from collections import defaultdict, namedtuple
-from collections.abc import Iterator
+import time
+from collections import defaultdict, deque, namedtuple
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, NewType
 
 import frappe
-from frappe.utils import add_to_date, flt
+from frappe.utils import add_to_date, cint, flt
 
 from ecommerce_integrations.controllers.scheduling import need_to_run
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
+	buffered_logs,
+)
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
-from ecommerce_integrations.unicommerce.api_client import UnicommerceAPIClient
+from ecommerce_integrations.unicommerce.api_client import JsonDict, UnicommerceAPIClient
 from ecommerce_integrations.unicommerce.constants import (
 	CHANNEL_ID_FIELD,
 	CHANNEL_TAX_ACCOUNT_FIELD_MAP,
@@ -27,11 +32,23 @@ from ecommerce_integrations.unicommerce.constants import (
 )
 from ecommerce_integrations.unicommerce.customer import sync_customer
 from ecommerce_integrations.unicommerce.product import import_product_from_unicommerce
-from ecommerce_integrations.unicommerce.utils import create_unicommerce_log, get_unicommerce_date
+from ecommerce_integrations.unicommerce.utils import (
+	create_unicommerce_log,
+	get_search_window,
+	get_unicommerce_date,
+	update_search_watermark,
+)
 from ecommerce_integrations.utils.taxation import get_dummy_tax_category
 
 UnicommerceOrder = NewType("UnicommerceOrder", dict[str, Any])
 
+DEFAULT_ORDER_FETCH_CONCURRENCY = 4
+ORDER_SEARCH_WINDOW = 24 * 60  # minutes
+
+# code -> `updated` timestamp of orders for which all available invoices were synced.
+PROCESSED_ORDERS_CACHE_KEY = "unicommerce_processed_orders"
+PROCESSED_ORDERS_RETENTION = 2 * 24 * 60 * 60  # seconds, longer than order search window
+
 
 def sync_new_orders(client: UnicommerceAPIClient = None, force=False):
 	"""This is called from a scheduled job and syncs all new orders from last synced time."""
@@ -50,22 +67,41 @@ def sync_new_orders(client: UnicommerceAPIClient = None, force=False):
 
 	status = "COMPLETE" if settings.only_sync_completed_orders else None
 
-	new_orders = _get_new_orders(client, status=status)
+	watermark = f"saleOrder/search:{status}"
+	updated_since, started_at = get_search_window(watermark, full_window=ORDER_SEARCH_WINDOW)
+	new_orders = _get_new_orders(client, status=status, updated_since=updated_since)
 
+	# failed search, window is searched again in next run
 	if new_orders is None:
 		return
 
-	for order in new_orders:
-		sales_order = create_order(order, client=client)
+	all_synced = True
+	with buffered_logs():
+		for order in new_orders:
+			sales_order = create_order(order, client=client)
+			if not sales_order:
+				all_synced = False
+				continue
+
+			if settings.only_sync_completed_orders:
+				if _create_sales_invoices(order, sales_order, client):
+					_record_processed_order(order)
+				else:
+					all_synced = False
+
+	# failed orders are searched again in next run
+	if all_synced:
+		update_search_watermark(watermark, started_at)
+	_prune_processed_orders()
 
-		if settings.only_sync_completed_orders:
-			_create_sales_invoices(order, sales_order, client)
 
+def _get_new_orders(
+	client: UnicommerceAPIClient, status: str | None, updated_since: int = ORDER_SEARCH_WINDOW
+) -> Iterator[UnicommerceOrder] | None:
+	"""Search new sales order from unicommerce.
 
-def _get_new_orders(client: UnicommerceAPIClient, status: str | None) -> Iterator[UnicommerceOrder] | None:
-	"""Search new sales order from unicommerce."""
+	Returns None if search failed, otherwise orders are fetched lazily while iterating."""
 
-	updated_since = 24 * 60  # minutes
 	uni_orders = client.search_sales_order(updated_since=updated_since, status=status)
 	configured_channels = {
 		c.channel_id
@@ -74,23 +110,108 @@ def _get_new_orders(client: UnicommerceAPIClient, status: str | None) -> Iterato
 	if uni_orders is None:
 		return
 
-	for order in uni_orders:
-		if order["channel"] not in configured_channels:
-			continue
+	uni_orders = [order for order in uni_orders if order["channel"] in configured_channels]
+	order_codes = [order["code"] for order in _filter_synced_orders(uni_orders, needs_invoice=bool(status))]
+	concurrency = cint(frappe.db.get_single_value(SETTINGS_DOCTYPE, "order_fetch_concurrency"))
+
+	return _fetch_sales_orders(client, order_codes, concurrency or DEFAULT_ORDER_FETCH_CONCURRENCY)
+
+
+def _filter_synced_orders(uni_orders: list[JsonDict], needs_invoice: bool) -> list[JsonDict]:
+	"""Remove search results which don't need to be fetched again.
+
+	New orders are always fetched. Already imported orders are fetched again only when invoices
+	are synced from Unicommerce, they are not fully billed and have changed since they were last
+	processed successfully. Orders with failed invoice creation are retried on every run."""
+	order_codes = [order["code"] for order in uni_orders]
+	if not order_codes:
+		return []
+
+	existing_orders = dict(
+		frappe.get_all(
+			"Sales Order",
+			filters={ORDER_CODE_FIELD: ("in", order_codes)},
+			fields=[ORDER_CODE_FIELD, "per_billed"],
+			as_list=True,
+		)
+	)
+	last_processed = _get_processed_orders() if needs_invoice else {}
+
+	def needs_fetch(order):
+		code = order["code"]
+		if code not in existing_orders:
+			return True
+		fully_billed = flt(existing_orders[code]) >= 100
+		return needs_invoice and not fully_billed and last_processed.get(code) != order["updated"]
+
+	return [order for order in uni_orders if needs_fetch(order)]
+
+
+def _get_processed_orders() -> dict[str, int]:
+	"""Get code -> `updated` timestamp of orders from processed orders ledger."""
+	# redis returns field names as bytes.
+	return {
+		frappe.safe_decode(code): updated
+		for code, updated in frappe.cache.hgetall(PROCESSED_ORDERS_CACHE_KEY).items()
+	}
 
-		# In case a sales invoice is not generated for some reason and is skipped, we need to create it manually. Therefore, I have commented out this line of code.
-		order = client.get_sales_order(order_code=order["code"])
-		if order:
-			yield order
+
+def _record_processed_order(order: UnicommerceOrder) -> None:
+	"""Remember `updated` timestamp of order which doesn't need processing till it changes."""
+	frappe.cache.hset(PROCESSED_ORDERS_CACHE_KEY, order["code"], order["updated"])
+
+
+def _prune_processed_orders() -> None:
+	"""Remove orders that can no longer show up in search results from processed orders ledger."""
+	cutoff = (time.time() - PROCESSED_ORDERS_RETENTION) * 1000  # unicommerce timestamps are in ms
+	for code, updated in _get_processed_orders().items():
+		if cint(updated) < cutoff:
+			frappe.cache.hdel(PROCESSED_ORDERS_CACHE_KEY, code)
+
+
+def _fetch_sales_orders(
+	client: UnicommerceAPIClient, order_codes: Iterable[str], concurrency: int
+) -> Iterator[UnicommerceOrder]:
+	"""Fetch sales order details using a bounded thread pool.
+
+	Orders are prefetched ahead of the consumer but yielded in same order as `order_codes`.
+	Threads only make HTTP requests, failed fetches are retried in main thread which also
+	creates error logs as usual."""
+
+	def fetch(code):
+		try:
+			return client.get_sales_order(order_code=code, log_error=False)
+		except Exception:
+			return None
+
+	with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+		pending = deque()
+		for code in order_codes:
+			pending.append((code, executor.submit(fetch, code)))
+			# don't queue more than two rounds of requests ahead of consumer.
+			if len(pending) >= concurrency * 2:
+				yield from _get_fetched_order(client, *pending.popleft())
+
+		while pending:
+			yield from _get_fetched_order(client, *pending.popleft())
+
+
+def _get_fetched_order(client: UnicommerceAPIClient, code, future) -> Iterator[UnicommerceOrder]:
+	order = future.result() or client.get_sales_order(order_code=code)
+	if order:
+		yield order
 
 
 def _create_sales_invoices(unicommerce_order, sales_order, client: UnicommerceAPIClient):
 	"""Create sales invoice from sales orders, used when integration is only
-	syncing finshed orders from Unicommerce."""
+	syncing finshed orders from Unicommerce.
+
+	Returns False if creating any of the invoices failed."""
 	from ecommerce_integrations.unicommerce.invoice import create_sales_invoice
 
 	facility_code = sales_order.get(FACILITY_CODE_FIELD)
 	shipping_packages = unicommerce_order["shippingPackages"]
+	all_synced = True
 	for package in shipping_packages:
 		try:
 			# This code was added because the log statement below was being executed every time.
@@ -117,9 +238,14 @@ def _create_sales_invoices(unicommerce_order, sales_order, client: UnicommerceAP
 		except Exception as e:
 			create_unicommerce_log(status="Error", exception=e, rollback=True, request_data=invoice_data)
 			frappe.flags.request_id = None
+			all_synced = False
 		else:
 			create_unicommerce_log(status="Success", request_data=invoice_data)
 			frappe.flags.request_id = None
+			# logs might be buffered, commit invoice so that failure of next one doesn't roll it back.
+			frappe.db.commit()
+
+	return all_synced
 
 
 def create_order(payload: UnicommerceOrder, request_id: str | None = None, client=None) -> None:
@@ -152,6 +278,8 @@ def create_order(payload: UnicommerceOrder, request_id: str | None = None, clien
 	else:
 		create_unicommerce_log(status="Success")
 		frappe.flags.request_id = None
+		# logs might be buffered, commit order so that failure of its invoices doesn't roll it back.
+		frappe.db.commit()
 		return order
 
 
@@ -220,14 +348,13 @@ def _get_line_items(
 	settings = frappe.get_cached_doc(SETTINGS_DOCTYPE)
 	wh_map = settings.get_integration_to_erpnext_wh_mapping(all_wh=True)
 	so_items = []
+	item_codes = get_item_codes(line_items)
 
 	for item in line_items:
 		if not is_cancelled and item.get("statusCode") == "CANCELLED":
 			continue
 
-		item_code = ecommerce_item.get_erpnext_item_code(
-			integration=MODULE_NAME, integration_item_code=item["itemSku"]
-		)
+		item_code = item_codes.get(item["itemSku"])
 		warehouse = wh_map.get(item["facilityCode"]) or default_warehouse
 
 		so_items.append(
@@ -258,10 +385,9 @@ def get_taxes(line_items, channel_config) -> list:
 		tax_head: channel_config.get(account_field)
 		for tax_head, account_field in CHANNEL_TAX_ACCOUNT_FIELD_MAP.items()
 	}
+	item_codes = get_item_codes(line_items)
 	for item in line_items:
-		item_code = ecommerce_item.get_erpnext_item_code(
-			integration=MODULE_NAME, integration_item_code=item["itemSku"]
-		)
+		item_code = item_codes.get(item["itemSku"])
 		for tax_head, unicommerce_field in TAX_FIELDS_MAPPING.items():
 			tax_amount = flt(item.get(unicommerce_field)) or 0.0
 			tax_rate_field = TAX_RATE_FIELDS_MAPPING.get(tax_head, "")
@@ -290,6 +416,14 @@ def get_taxes(line_items, channel_config) -> list:
 	return taxes
 
 
+def get_item_codes(line_items) -> dict[str, str | None]:
+	"""Get map of SKU to ERPNext item code for all line items using a single query."""
+	item_codes = ecommerce_item.get_erpnext_item_codes(
+		MODULE_NAME, [(item["itemSku"], None, None) for item in line_items]
+	)
+	return {key[0]: item_code for key, item_code in item_codes.items()}
+
+
 def _get_facility_code(line_items) -> str:
 	facility_codes = {item.get("facilityCode") for item in line_items}
 
@@ -14,6 +14,7 @@ from ecommerce_integrations.unicommerce.constants import (
 	SHIPPING_PACKAGE_CODE_FIELD,
 	SHIPPING_PACKAGE_STATUS_FIELD,
 )
+from ecommerce_integrations.unicommerce.utils import get_search_window, update_search_watermark
 
 ORDER_STATES = ["PENDING_VERIFICATION", "CREATED", "PROCESSING", "COMPLETE", "CANCELLED"]
 PARTIAL_CANCELLED_STATES = ["PENDING_VERIFICATION", "CREATED", "PROCESSING"]
@@ -54,8 +55,10 @@ def update_sales_order_status():
 	client = UnicommerceAPIClient()
 
 	days_to_sync = min(settings.get("order_status_days") or 2, 14)
-	minutes = days_to_sync * 24 * 60
+	minutes, started_at = get_search_window("saleOrder/search:status", full_window=days_to_sync * 24 * 60)
 	updated_orders = client.search_sales_order(updated_since=minutes)
+	if updated_orders is None:
+		return
 
 	enabled_channels = frappe.db.get_list("Unicommerce Channel", filters={"enabled": 1}, pluck="channel_id")
 	valid_orders = [order for order in updated_orders if order.get("channel") in enabled_channels]
@@ -74,6 +77,8 @@ def update_sales_order_status():
 	if probable_returns:
 		check_and_update_customer_initiated_returns(probable_returns, client=client)
 
+	update_search_watermark("saleOrder/search:status", started_at)
+
 
 def _update_order_status_fields(orders):
 	order_status_map = {d["code"]: d["status"] for d in orders}
@@ -113,24 +118,28 @@ def update_shipping_package_status():
 	client = UnicommerceAPIClient()
 
 	days_to_sync = min(settings.get("order_status_days") or 2, 14)
-	minutes = days_to_sync * 24 * 60
 
 	# find all Facilities
 	enabled_facilities = list(settings.get_integration_to_erpnext_wh_mapping().keys())
 	enabled_channels = frappe.db.get_list("Unicommerce Channel", filters={"enabled": 1}, pluck="channel_id")
 
 	for facility in enabled_facilities:
+		watermark = f"shippingPackage/search:{facility}"
+		minutes, started_at = get_search_window(watermark, full_window=days_to_sync * 24 * 60)
 		updated_packages = client.search_shipping_packages(updated_since=minutes, facility_code=facility)
+		if updated_packages is None:
+			continue
 		valid_packages = [p for p in updated_packages if p.get("channel") in enabled_channels]
 
-		if not valid_packages:
-			continue
-		_update_package_status_fields(valid_packages)
+		if valid_packages:
+			_update_package_status_fields(valid_packages)
+
+			returning_packages = [p for p in valid_packages if p["status"] in SHIPMENT_RETURN_STATES]
+			if returning_packages:
+				for package in returning_packages:
+					create_rto_return(package, client=client)
 
-		returning_packages = [p for p in valid_packages if p["status"] in SHIPMENT_RETURN_STATES]
-		if returning_packages:
-			for package in returning_packages:
-				create_rto_return(package, client=client)
+		update_search_watermark(watermark, started_at)
 
 
 def _update_package_status_fields(packages):
@@ -82,6 +82,17 @@ class TestUnicommerceClient(TestCaseApiClient):
 
 		self.assert_last_request_headers("Authorization", "Bearer AUTH_TOKEN")
 
+	def test_session_is_reused(self):
+		"""requirement: all clients in a process share same keep-alive session"""
+		from ecommerce_integrations.unicommerce.api_client import get_connection_stats, get_session
+
+		client = UnicommerceAPIClient("https://demostaging.unicommerce.com", "AUTH_TOKEN")
+		self.assertIs(client.session, self.client.session)
+		self.assertIs(client.session, get_session())
+
+		stats = get_connection_stats()
+		self.assertGreaterEqual(stats["requests"], stats["reused"])
+
 	def test_get_item(self):
 		"""requirement: When querying correct item, item is returned as _dict"""
 
@@ -1,3 +1,4 @@
+import time
 from unittest.mock import patch
 
 import frappe
@@ -6,9 +7,21 @@ from erpnext.stock.doctype.item.test_item import make_item
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
 from erpnext.stock.utils import get_stock_balance
 
+from ecommerce_integrations.controllers.inventory import (
+	PUSHED_INVENTORY_EXPIRY,
+	bulk_update_inventory_sync_status,
+	get_inventory_level_pages,
+	get_pushed_quantities,
+	mark_inventory_dirty,
+	pop_dirty_inventory,
+	record_pushed_quantities,
+)
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item import ecommerce_item
 from ecommerce_integrations.unicommerce.constants import MODULE_NAME
-from ecommerce_integrations.unicommerce.inventory import update_inventory_on_unicommerce
+from ecommerce_integrations.unicommerce.inventory import (
+	_get_inventory_chunks,
+	update_inventory_on_unicommerce,
+)
 from ecommerce_integrations.unicommerce.tests.test_client import TestCaseApiClient
 
 
@@ -91,6 +104,76 @@ class TestUnicommerceProduct(TestCaseApiClient):
 		# responses library should match the correct response and fail if not done so.
 		update_inventory_on_unicommerce(client=self.client, force=True)
 
+	@patch("ecommerce_integrations.unicommerce.inventory.MAX_INVENTORY_UPDATE_IN_REQUEST", 1)
+	def test_inventory_chunks(self):
+		"""requirement: whole backlog is chunked and chunks of facilities are interleaved"""
+		make_stock_entry(item_code="_TestInventoryItemA", qty=1, to_warehouse="Stores - WP", rate=10)
+		make_stock_entry(item_code="_TestInventoryItemB", qty=1, to_warehouse="Stores - WP", rate=10)
+		make_stock_entry(
+			item_code="_TestInventoryItemC", qty=1, to_warehouse="Work In Progress - WP", rate=10
+		)
+
+		settings = frappe.get_cached_doc("Unicommerce Settings")
+		chunks = list(
+			_get_inventory_chunks(
+				settings.get_erpnext_warehouses(),
+				settings.get_erpnext_to_integration_wh_mapping(),
+				dirty_inventory=None,
+				skip_unchanged=False,
+				success_map={},
+				stats=frappe._dict(skipped=0),
+			)
+		)
+
+		self.assertGreaterEqual(len(chunks), 3)
+		self.assertTrue(all(len(chunk.inventory_map) == 1 for chunk in chunks))
+		self.assertEqual(len({chunk.facility_code for chunk in chunks[:2]}), 2)
+
+	def test_inventory_level_pages(self):
+		"""requirement: changed inventory is streamed in pages without skipping or repeating rows"""
+		make_stock_entry(item_code="_TestInventoryItemA", qty=1, to_warehouse="Stores - WP", rate=10)
+		make_stock_entry(item_code="_TestInventoryItemB", qty=1, to_warehouse="Stores - WP", rate=10)
+
+		pages = list(get_inventory_level_pages(("Stores - WP",), MODULE_NAME, page_size=1))
+		keys = [(row.ecom_item, row.warehouse) for page in pages for row in page]
+
+		self.assertTrue(all(len(page) == 1 for page in pages))
+		self.assertGreaterEqual(len(keys), 2)
+		self.assertEqual(keys, sorted(set(keys)))
+
+	def test_dirty_inventory(self):
+		"""requirement: changed stock is tracked till it's picked up by next sync"""
+		pop_dirty_inventory(MODULE_NAME)
+
+		changes = {("_TestInventoryItemA", "Stores - WP"), ("_TestInventoryItemC", "Work In Progress - WP")}
+		mark_inventory_dirty(MODULE_NAME, changes, on_commit=False)
+
+		self.assertEqual(pop_dirty_inventory(MODULE_NAME), changes)
+		self.assertEqual(pop_dirty_inventory(MODULE_NAME), set())
+
+	def test_pushed_quantities(self):
+		"""requirement: last pushed quantity is tracked per item and location"""
+		record_pushed_quantities(MODULE_NAME, {("ECOM-A", "A"): 10, ("ECOM-A", "B"): 0})
+
+		pushed = get_pushed_quantities(MODULE_NAME, [("ECOM-A", "A"), ("ECOM-A", "B"), ("ECOM-B", "A")])
+		self.assertEqual(pushed, {("ECOM-A", "A"): 10, ("ECOM-A", "B"): 0})
+
+		# entries older than expiry are pushed again even if other entries are updated
+		stale_time = time.time() - PUSHED_INVENTORY_EXPIRY - 1
+		record_pushed_quantities(MODULE_NAME, {("ECOM-A", "B"): 5}, pushed_at=stale_time)
+		record_pushed_quantities(MODULE_NAME, {("ECOM-B", "A"): 1})
+
+		pushed = get_pushed_quantities(MODULE_NAME, [("ECOM-A", "A"), ("ECOM-A", "B"), ("ECOM-B", "A")])
+		self.assertEqual(pushed, {("ECOM-A", "A"): 10, ("ECOM-B", "A"): 1})
+
+	def test_bulk_update_inventory_sync_status(self):
+		ecom_items = [d for d in self.ecom_items if d]
+		bulk_update_inventory_sync_status(ecom_items, time="2030-01-01 00:00:00")
+
+		for ecom_item in ecom_items:
+			synced_on = frappe.db.get_value("Ecommerce Item", ecom_item, "inventory_synced_on")
+			self.assertEqual(str(synced_on), "2030-01-01 00:00:00")
+
 
 def make_ecommerce_item(item_code):
 	if ecommerce_item.is_synced(MODULE_NAME, item_code):
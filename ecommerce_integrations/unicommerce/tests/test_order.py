@@ -1,8 +1,10 @@
 from collections import defaultdict
 from copy import deepcopy
+from unittest.mock import patch
 
 import frappe
 from frappe.test_runner import make_test_records
+from frappe.utils import flt
 
 from ecommerce_integrations.unicommerce.constants import (
 	CHANNEL_ID_FIELD,
@@ -10,12 +12,22 @@ from ecommerce_integrations.unicommerce.constants import (
 	ORDER_STATUS_FIELD,
 )
 from ecommerce_integrations.unicommerce.order import (
+	PROCESSED_ORDERS_CACHE_KEY,
+	_fetch_sales_orders,
+	_filter_synced_orders,
 	_get_facility_code,
 	_get_line_items,
+	_record_processed_order,
 	_sync_order_items,
 	create_order,
+	sync_new_orders,
 )
 from ecommerce_integrations.unicommerce.tests.test_client import TestCaseApiClient
+from ecommerce_integrations.unicommerce.utils import (
+	SEARCH_WATERMARK_KEY,
+	clear_search_watermarks,
+	update_search_watermark,
+)
 
 
 class TestUnicommerceOrder(TestCaseApiClient):
@@ -38,6 +50,14 @@ class TestUnicommerceOrder(TestCaseApiClient):
 			order = self.load_fixture(order_file)["saleOrderDTO"]
 			self.assertEqual(items, _sync_order_items(order, client=self.client))
 
+	def test_fetch_sales_orders(self):
+		"""requirement: concurrently fetched orders are returned in same order as requested"""
+		order_codes = ["SO5905", "SO5906", "SO5907", "SO5841"]
+
+		orders = list(_fetch_sales_orders(self.client, order_codes, concurrency=2))
+
+		self.assertEqual([order["code"] for order in orders], order_codes)
+
 	def test_get_line_items(self):
 		so_items = self.load_fixture("order-SO6008-order")["saleOrderItems"]
 		items = _get_line_items(so_items)
@@ -109,3 +129,51 @@ class TestUnicommerceOrder(TestCaseApiClient):
 		amount = sum(item.amount for item in so.items)
 		self.assertEqual(qty, 11)
 		self.assertAlmostEqual(amount, 7028.0)
+
+	def test_filter_synced_orders(self):
+		"""requirement: details of already imported orders are not fetched again"""
+		order = self.load_fixture("order-SO5906")["saleOrderDTO"]
+		create_order(order, client=self.client)
+		search_results = self.load_fixture("so_search_results")["elements"]
+
+		to_fetch = {o["code"] for o in _filter_synced_orders(search_results, needs_invoice=False)}
+		self.assertNotIn("SO5906", to_fetch)
+		self.assertIn("SO5905", to_fetch)
+
+		# unbilled orders are fetched again for invoices
+		to_fetch = {o["code"] for o in _filter_synced_orders(search_results, needs_invoice=True)}
+		self.assertIn("SO5906", to_fetch)
+
+	def test_filter_processed_orders(self):
+		"""requirement: processed orders are not fetched again till they are updated"""
+		order = self.load_fixture("order-SO5906")["saleOrderDTO"]
+		create_order(order, client=self.client)
+		search_results = self.load_fixture("so_search_results")["elements"]
+		search_result = next(o for o in search_results if o["code"] == "SO5906")
+
+		_record_processed_order(search_result)
+		self.addCleanup(frappe.cache.hdel, PROCESSED_ORDERS_CACHE_KEY, "SO5906")
+
+		to_fetch = {o["code"] for o in _filter_synced_orders(search_results, needs_invoice=True)}
+		self.assertNotIn("SO5906", to_fetch)
+
+		updated_result = {**search_result, "updated": search_result["updated"] + 1000}
+		to_fetch = {o["code"] for o in _filter_synced_orders([updated_result], needs_invoice=True)}
+		self.assertIn("SO5906", to_fetch)
+
+	@patch(
+		"ecommerce_integrations.unicommerce.doctype.unicommerce_settings.unicommerce_settings.UnicommerceSettings.is_enabled",
+		return_value=True,
+	)
+	def test_failed_search_keeps_watermark(self, _):
+		"""requirement: window is searched again when order search fails"""
+		clear_search_watermarks()
+		self.addCleanup(clear_search_watermarks)
+		settings = frappe.get_cached_doc("Unicommerce Settings")
+		watermark = "saleOrder/search:{}".format("COMPLETE" if settings.only_sync_completed_orders else None)
+		update_search_watermark(watermark, 1000.0)
+
+		with patch.object(self.client, "search_sales_order", return_value=None):
+			sync_new_orders(client=self.client, force=True)
+
+		self.assertEqual(flt(frappe.db.get_global(SEARCH_WATERMARK_KEY.format(watermark))), 1000.0)
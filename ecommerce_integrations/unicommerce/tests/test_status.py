@@ -6,6 +6,12 @@ from ecommerce_integrations.unicommerce.cancellation_and_returns import (
 )
 from ecommerce_integrations.unicommerce.constants import ORDER_ITEM_CODE_FIELD
 from ecommerce_integrations.unicommerce.tests.test_client import TestCaseApiClient
+from ecommerce_integrations.unicommerce.utils import (
+	SEARCH_WATERMARK_OVERLAP,
+	clear_search_watermarks,
+	get_search_window,
+	update_search_watermark,
+)
 
 
 class TestUnicommerceStatusUpdates(TestCaseApiClient):
@@ -23,3 +29,20 @@ class TestUnicommerceStatusUpdates(TestCaseApiClient):
 		items = _delete_cancelled_items([item1, item2], cancelled_items)
 		self.assertEqual(len(items), 1)
 		self.assertEqual("not cancelled", items[0].get(ORDER_ITEM_CODE_FIELD))
+
+	def test_incremental_search_window(self):
+		"""requirement: searches only cover changes since last successful sync, with overlap"""
+		clear_search_watermarks()
+		self.addCleanup(clear_search_watermarks)
+
+		minutes, started_at = get_search_window("test", full_window=24 * 60)
+		self.assertEqual(minutes, 24 * 60)
+
+		update_search_watermark("test", started_at - 5 * 60)
+		minutes, _ = get_search_window("test", full_window=24 * 60)
+		self.assertLessEqual(minutes, 6 + SEARCH_WATERMARK_OVERLAP)
+
+		# stale watermark falls back to full window
+		update_search_watermark("test", started_at - 2 * 24 * 60 * 60)
+		minutes, _ = get_search_window("test", full_window=24 * 60)
+		self.assertEqual(minutes, 24 * 60)
@@ -1,6 +1,9 @@
 import datetime
+import math
+import time
 
 import frappe
+from frappe.utils import flt
 
 from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_integration_log.ecommerce_integration_log import (
 	create_log,
@@ -13,6 +16,12 @@ SYNC_METHODS = {
 	"Inventory": "ecommerce_integrations.unicommerce.inventory.update_inventory_on_unicommerce",
 }
 
+# global default with unix time at which last successful incremental search of endpoint started,
+# every endpoint has its own key so that jobs searching different endpoints don't contend.
+SEARCH_WATERMARK_KEY = "unicommerce_search_watermark:{}"
+# minutes searched before the watermark to cover clock skew and updates in-flight during last run.
+SEARCH_WATERMARK_OVERLAP = 10
+
 DOCUMENT_URL_FORMAT = {
 	"Sales Order": "https://{site}/order/orderitems?orderCode={code}",
 	"Sales Invoice": "https://{site}/order/orderitems?orderCode={code}",
@@ -54,3 +63,33 @@ def get_unicommerce_date(timestamp: int) -> datetime.date:
 
 def remove_non_alphanumeric_chars(filename: str) -> str:
 	return "".join(c for c in filename if c.isalpha() or c.isdigit()).strip()
+
+
+def get_search_window(endpoint: str, full_window: int) -> tuple[int, float]:
+	"""Get `updatedSinceInMinutes` to search only for changes since last successful sync of endpoint.
+
+	Falls back to `full_window` (minutes) when there is no watermark or it's older than the full window.
+	Returns window and start time of this run which should be saved using `update_search_watermark`
+	after all search results are processed successfully."""
+	started_at = time.time()
+	last_synced = _get_search_watermark(endpoint)
+	if not last_synced:
+		return full_window, started_at
+
+	minutes = math.ceil((started_at - last_synced) / 60) + SEARCH_WATERMARK_OVERLAP
+	return min(minutes, full_window), started_at
+
+
+def update_search_watermark(endpoint: str, synced_at: float) -> None:
+	frappe.db.set_global(SEARCH_WATERMARK_KEY.format(endpoint), synced_at)
+
+
+def clear_search_watermarks() -> None:
+	frappe.db.delete(
+		"DefaultValue", {"parent": "__global", "defkey": ("like", SEARCH_WATERMARK_KEY.format("%"))}
+	)
+	frappe.defaults.clear_cache("__global")
+
+
+def _get_search_watermark(endpoint: str) -> float | None:
+	return flt(frappe.db.get_global(SEARCH_WATERMARK_KEY.format(endpoint))) or None
@@ -0,0 +1,94 @@
+"""Benchmark lookups done by integrations with and without the indexes they need.
+
+Queries are run on temporary tables filled with synthetic rows, so site data isn't touched.
+
+Usage:
+	bench --site <site> execute ecommerce_integrations.utils.index_benchmark.run --kwargs "{'rows': 1000000}"
+"""
+
+import random
+import time
+
+import frappe
+
+from ecommerce_integrations.ecommerce_integrations.doctype.ecommerce_item.ecommerce_item import (
+	ECOMMERCE_ITEM_INDEXES,
+)
+from ecommerce_integrations.utils.indexes import INTEGRATION_LINK_INDEXES
+
+INTEGRATIONS = ("shopify", "unicommerce", "amazon")
+INSERT_BATCH_SIZE = 10_000
+
+
+def run(rows: int = 1_000_000, lookups: int = 200) -> dict:
+	"""Time lookups on `rows` synthetic rows before and after adding indexes.
+
+	Returns (and logs) average milliseconds per lookup for each query."""
+	if frappe.db.db_type != "mariadb":
+		frappe.throw("Benchmark is only supported on MariaDB")
+
+	benchmarks = {
+		"bench_ecommerce_item": (
+			["integration", "integration_item_code", "variant_id", "sku", "erpnext_item_code"],
+			ECOMMERCE_ITEM_INDEXES,
+		),
+	}
+	for doctype, fieldnames in INTEGRATION_LINK_INDEXES.items():
+		table = "bench_" + frappe.scrub(doctype)
+		benchmarks[table] = (fieldnames, [[fieldname] for fieldname in fieldnames])
+
+	logger = frappe.logger("ecommerce_integrations")
+	results = {}
+	for table, (columns, indexes) in benchmarks.items():
+		_create_table(table, columns, rows)
+		try:
+			before = _time_lookups(table, indexes, rows, lookups)
+			for index in indexes:
+				frappe.db.sql_ddl(f"alter table `{table}` add index ({', '.join(f'`{c}`' for c in index)})")
+			after = _time_lookups(table, indexes, rows, lookups)
+		finally:
+			frappe.db.sql_ddl(f"drop temporary table if exists `{table}`")
+
+		for query, duration in before.items():
+			results[query] = {"before_ms": duration, "after_ms": after[query]}
+			logger.info(f"Index benchmark {query}: {duration:.3f} ms -> {after[query]:.3f} ms")
+
+	return results
+
+
+def _create_table(table: str, columns: list[str], rows: int) -> None:
+	column_defs = ", ".join(f"`{column}` varchar(140)" for column in columns)
+	frappe.db.sql_ddl(f"drop temporary table if exists `{table}`")
+	frappe.db.sql_ddl(
+		f"create temporary table `{table}` (name bigint primary key, {column_defs}) engine=InnoDB"
+	)
+
+	placeholders = "({})".format(", ".join(["%s"] * (len(columns) + 1)))
+	for start in range(0, rows, INSERT_BATCH_SIZE):
+		batch = range(start, min(start + INSERT_BATCH_SIZE, rows))
+		values = [value for i in batch for value in _make_row(columns, i)]
+		frappe.db.sql(
+			f"insert into `{table}` values {', '.join([placeholders] * len(batch))}",
+			values,
+		)
+
+
+def _make_row(columns: list[str], i: int) -> list:
+	return [i] + [INTEGRATIONS[i % len(INTEGRATIONS)] if c == "integration" else f"{c}-{i}" for c in columns]
+
+
+def _time_lookups(table: str, indexes: list[list[str]], rows: int, lookups: int) -> dict[str, float]:
+	"""Average time in ms of looking up random existing rows using columns of each index."""
+	timings = {}
+	for index in indexes:
+		conditions = " and ".join(f"`{column}` = %s" for column in index)
+		query = f"select name from `{table}` where {conditions}"
+
+		samples = [random.randrange(rows) for _ in range(lookups)]
+		start = time.perf_counter()
+		for i in samples:
+			row = dict(zip(index, _make_row(index, i)[1:], strict=True))
+			frappe.db.sql(query, [row[column] for column in index])
+		timings[f"{table}({', '.join(index)})"] = (time.perf_counter() - start) * 1000 / lookups
+
+	return timings
@@ -0,0 +1,40 @@
+"""Database indexes on custom fields which integrations use to find their documents."""
+
+import frappe
+
+from ecommerce_integrations.shopify.constants import ORDER_ID_FIELD as SHOPIFY_ORDER_ID_FIELD
+from ecommerce_integrations.unicommerce.constants import (
+	INVOICE_CODE_FIELD,
+	ORDER_CODE_FIELD,
+	SHIPPING_PACKAGE_CODE_FIELD,
+)
+
+# doctype -> custom fields used in idempotency checks and status updates.
+INTEGRATION_LINK_INDEXES = {
+	"Sales Order": [SHOPIFY_ORDER_ID_FIELD, ORDER_CODE_FIELD, "amazon_order_id"],
+	"Sales Invoice": [
+		SHOPIFY_ORDER_ID_FIELD,
+		ORDER_CODE_FIELD,
+		INVOICE_CODE_FIELD,
+		SHIPPING_PACKAGE_CODE_FIELD,
+		"zenoti_invoice_no",
+	],
+	"Delivery Note": [SHOPIFY_ORDER_ID_FIELD, ORDER_CODE_FIELD],
+}
+
+# text columns can only be indexed on a prefix.
+TEXT_INDEX_PREFIX_LENGTH = 140
+
+
+def add_integration_link_indexes() -> None:
+	"""Add missing indexes on custom fields of integrations that are set up on this site."""
+	for doctype, fieldnames in INTEGRATION_LINK_INDEXES.items():
+		meta = frappe.get_meta(doctype)
+		for fieldname in fieldnames:
+			field = meta.get_field(fieldname)
+			if not field or not frappe.db.has_column(doctype, fieldname):
+				continue
+
+			if field.fieldtype in ("Small Text", "Text", "Long Text"):
+				fieldname = f"{fieldname}({TEXT_INDEX_PREFIX_LENGTH})"
+			frappe.db.add_index(doctype, [fieldname])
@@ -11,7 +11,7 @@ from ecommerce_integrations.zenoti.sales_transactions import (
 	create_customer,
 	prepare_customer_details,
 )
-from ecommerce_integrations.zenoti.utils import api_url, create_item, make_api_call
+from ecommerce_integrations.zenoti.utils import ZenotiClient, api_url, create_item
 
 emp_gender_map = {
 	-1: "NotSpecified",
@@ -28,8 +28,8 @@ class ZenotiCenter(Document):
 		employees = []
 		for page in range(1, 100):
 			url = api_url + "/centers/" + self.name + "/employees?size=100&page=" + str(page)
-			all_emps = make_api_call(url)
-			if all_emps.get("employees"):
+			all_emps = ZenotiClient().get(url)
+			if all_emps and all_emps.get("employees"):
 				employees = employees + all_emps.get("employees")
 			else:
 				break
@@ -46,12 +46,12 @@ class ZenotiCenter(Document):
 
 	def sync_customers(self):
 		url = api_url + "guests?center_id=" + str(self.name)
-		customers = make_api_call(url)
+		customers = ZenotiClient().get(url)
 		if customers:
 			total_page = customers["page_Info"]["total"] // 100
 			for page in range(1, total_page + 2):
 				url_ = url + "&size=100&page=" + str(page)
-				all_customers = make_api_call(url_)
+				all_customers = ZenotiClient().get(url_)
 				if all_customers:
 					for customer in all_customers["guests"]:
 						if not frappe.db.exists("Customer", {"zenoti_guest_id": customer["id"]}):
@@ -64,12 +64,12 @@ class ZenotiCenter(Document):
 		# item_types = ["memberships"]
 		for item_type in item_types:
 			url = api_url + "centers/" + str(self.name) + "/" + item_type
-			products = make_api_call(url)
+			products = ZenotiClient().get(url)
 			if products:
 				total_page = products["page_info"]["total"] // 100
 				for page in range(1, total_page + 2):
 					url_ = url + "?size=100&page=" + str(page)
-					all_products = make_api_call(url_)
+					all_products = ZenotiClient().get(url_)
 					if all_products:
 						for product in all_products[item_type]:
 							if not frappe.db.exists(
@@ -80,12 +80,12 @@ class ZenotiCenter(Document):
 
 	def sync_category(self):
 		url = api_url + "centers/" + str(self.name) + "/categories?include_sub_categories=true"
-		categories = make_api_call(url)
+		categories = ZenotiClient().get(url)
 		if categories:
 			total_page = categories["page_info"]["total"] // 100
 			for page in range(1, total_page + 2):
 				url_ = url + "&size=100&page=" + str(page)
-				all_categories = make_api_call(url_)
+				all_categories = ZenotiClient().get(url_)
 				if all_categories:
 					for category in all_categories["categories"]:
 						if not frappe.db.exists("Zenoti Category", {"category_id": category["id"]}):
@@ -2,7 +2,6 @@
 # For license information, please see LICENSE
 
 import frappe
-import requests
 from frappe import _
 from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
 from frappe.model.document import Document
@@ -11,7 +10,11 @@ from frappe.utils import add_to_date, cint, cstr, date_diff, get_datetime
 from ecommerce_integrations.zenoti.purchase_transactions import process_purchase_orders
 from ecommerce_integrations.zenoti.sales_transactions import process_sales_invoices
 from ecommerce_integrations.zenoti.stock_reconciliation import process_stock_reconciliation
-from ecommerce_integrations.zenoti.utils import api_url, get_all_centers, get_list_of_centers
+from ecommerce_integrations.zenoti.utils import (
+	ZenotiClient,
+	get_all_centers,
+	get_list_of_centers,
+)
 
 
 class ZenotiSettings(Document):
@@ -19,11 +22,7 @@ class ZenotiSettings(Document):
 		if not self.enable_zenoti:
 			return
 
-		url = api_url + "centers"
-		headers = {}
-		headers["Authorization"] = "apikey " + cstr(self.api_key)
-		response = requests.request("GET", url=url, headers=headers)
-		if response.status_code != 200:
+		if ZenotiClient(api_key=cstr(self.api_key), max_retries=0).get("centers", log_error=False) is None:
 			frappe.throw("Please verify the API Key")
 		check_for_opening_stock_reconciliation()
 		check_perpetual_inventory_disabled()
@@ -3,13 +3,13 @@ from frappe import _
 from frappe.utils import add_to_date
 
 from ecommerce_integrations.zenoti.utils import (
+	ZenotiClient,
 	add_taxes,
 	api_url,
 	check_for_item,
 	check_for_item_tax_template,
 	get_item_tax_rate,
 	make_address,
-	make_api_call,
 )
 
 
@@ -29,7 +29,7 @@ def get_list_of_purchase_orders_for_center(center, date=None):
 	route = "inventory/purchase_orders?center_id="
 	url_end = "&show_delivery_details=true&date_criteria=1&status=-1"
 	full_url = api_url + route + center + "&start_date=" + start_date + "&end_date=" + end_date + url_end
-	all_orders = make_api_call(full_url)
+	all_orders = ZenotiClient().get(full_url)
 	return all_orders
 
 
@@ -63,12 +63,12 @@ def check_for_supplier(supplier_code):
 
 def sync_supplier():
 	url = api_url + "vendors"
-	suppliers = make_api_call(url)
+	suppliers = ZenotiClient().get(url)
 	if suppliers:
 		total_page = suppliers["page_info"]["total"] // 100
 		for page in range(1, total_page + 2):
 			url_ = url + "?size=100&page=" + str(page)
-			all_suppliers = make_api_call(url_)
+			all_suppliers = ZenotiClient().get(url_)
 			if all_suppliers:
 				for supplier in all_suppliers["vendors"]:
 					if not frappe.db.exists("Supplier", {"zenoti_supplier_code": supplier["code"]}):
@@ -3,6 +3,7 @@ from frappe import _
 from frappe.utils import add_days, add_to_date, cint, flt, get_date_str, today
 
 from ecommerce_integrations.zenoti.utils import (
+	ZenotiClient,
 	add_items,
 	add_payments,
 	add_taxes,
@@ -11,7 +12,6 @@ from ecommerce_integrations.zenoti.utils import (
 	create_item,
 	get_list_of_centers,
 	make_address,
-	make_api_call,
 	make_item,
 )
 
@@ -56,7 +56,7 @@ def get_list_of_invoices_for_center(center, start_date, end_date):
 		+ end_date
 		+ "&item_type=7&status=1"
 	)
-	sales_report = make_api_call(full_url)
+	sales_report = ZenotiClient().get(full_url)
 
 	list_of_invoice_for_center = []
 	invoice = []
@@ -202,7 +202,7 @@ def get_emp(employess, emp_name, emp_code, key):
 
 def filter_emp(url, emp_name, emp_code, key):
 	employee = None
-	all_emps = make_api_call(url)
+	all_emps = ZenotiClient().get(url)
 	if all_emps:
 		for emp in all_emps[key]:
 			if emp["personal_info"]["name"] == emp_name and emp["code"] == emp_code:
@@ -404,7 +404,7 @@ def prepare_customer_details(guest_details):
 
 def get_guest_details(guest_id):
 	url = api_url + "guests/" + guest_id
-	guest_details = make_api_call(url)
+	guest_details = ZenotiClient().get(url)
 	return guest_details
 
 
@@ -3,7 +3,7 @@ from erpnext.stock.doctype.stock_reconciliation.stock_reconciliation import get_
 from frappe import _
 from frappe.utils import flt, now
 
-from ecommerce_integrations.zenoti.utils import api_url, check_for_item, make_api_call
+from ecommerce_integrations.zenoti.utils import ZenotiClient, api_url, check_for_item
 
 
 def process_stock_reconciliation(center, error_logs, date=None):
@@ -30,7 +30,7 @@ def process_stock_reconciliation(center, error_logs, date=None):
 
 def retrieve_stock_quantities_of_products(center, date):
 	url = api_url + f"inventory/stock?center_id={center}&inventory_date={date}"
-	stock_quantities_of_products = make_api_call(url)
+	stock_quantities_of_products = ZenotiClient().get(url)
 	return stock_quantities_of_products
 
 
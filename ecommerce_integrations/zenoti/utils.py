@@ -1,14 +1,32 @@
 import json
 import math
+import os
+import random
+import time
 
 import frappe
 import requests
 from erpnext.controllers.accounts_controller import add_taxes_from_tax_template
 from frappe import _
-from frappe.utils import cint, flt
+from frappe.utils import cint, cstr, flt
+from requests.adapters import HTTPAdapter
 
 api_url = "https://api.zenoti.com/v1/"
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (10, 120)
+MAX_RETRIES = 3
+BACKOFF_BASE = 1
+MAX_BACKOFF = 30
+# longest wait for rate limit window to reset before retrying a throttled call
+MAX_RATE_LIMIT_WAIT = 60
+# start spacing out calls when these many calls are left in current rate limit window
+PACING_THRESHOLD = 10
+
+_session = None
+_session_pid = None
+_rate_limit = {"remaining": None, "reset_at": 0}
+
 item_type = {
 	"Services": "services",
 	"Products": "products",
@@ -18,43 +36,112 @@ item_type = {
 }
 
 
-def make_api_call(url):
-	headers = get_headers()
-	response = requests.request("GET", url=url, headers=headers)
-	res_headers = dict(response.headers)
-	if res_headers.get("RateLimit-Reset"):
-		frappe.flags.zenoti_rate_limit_reset_time = cint(res_headers.get("RateLimit-Reset"))
+class ZenotiClient:
+	"""Client for Zenoti REST API.
 
-	if response.status_code == 429:
-		if not res_headers.get("RateLimit-Remaining"):
-			import time
+	All clients of a process share a keep-alive session. Calls are paced using `RateLimit-*`
+	response headers and throttled calls are retried a few times after the rate limit window
+	resets, waiting at most `MAX_RATE_LIMIT_WAIT` seconds per retry."""
 
-			time.sleep(frappe.flags.zenoti_rate_limit_reset_time + 1)
-			response = requests.request("GET", url=url, headers=headers)
+	def __init__(self, api_key=None, max_retries=MAX_RETRIES, timeout=DEFAULT_TIMEOUT):
+		self._api_key = api_key
+		self.max_retries = max_retries
+		self.timeout = timeout
+		self.session = get_session()
+
+	@property
+	def api_key(self):
+		# settings are cached and invalidated by framework on update, no DB query per call
+		return self._api_key or cstr(frappe.db.get_single_value("Zenoti Settings", "api_key", cache=True))
+
+	def get(self, url, log_error=True):
+		"""Make GET request to Zenoti and return parsed response, `None` on failure.
+
+		url: absolute url or path relative to `api_url`."""
+		if not url.startswith("http"):
+			url = api_url + url.lstrip("/")
+
+		headers = {"Authorization": "apikey " + self.api_key}
+
+		for attempt in range(self.max_retries + 1):
+			_wait_for_rate_limit()
+			response = self.session.get(url, headers=headers, timeout=self.timeout)
+			_update_rate_limit(response.headers)
+
+			if response.status_code != 429 or attempt == self.max_retries:
+				break
+			time.sleep(get_backoff_delay(attempt, response.headers))
+
+		if response.status_code != 200:
+			if log_error:
+				_log_error(url, response)
+			return
+
+		return convert_str_to_json(response.text)
 
-	if response.status_code != 200:
-		content = json.loads(response._content.decode("utf-8"))
-		frappe.get_doc(
-			{
-				"doctype": "Zenoti Error Logs",
-				"title": content.get("Message"),
-				"error_message": content.get("InternalMessage"),
-				"request_url": url,
-				"status_code": content.get("StatusCode"),
-			}
-		).insert(ignore_permissions=True)
 
+def get_session():
+	"""Get keep-alive session shared by all Zenoti clients of current process."""
+	global _session, _session_pid
+
+	if _session is None or _session_pid != os.getpid():
+		_session = requests.Session()
+		_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=DEFAULT_POOL_SIZE))
+		_session_pid = os.getpid()
+
+	return _session
+
+
+def get_backoff_delay(attempt, headers=None):
+	"""Seconds to wait before retrying a throttled call.
+
+	Waits till the rate limit window resets if response says when (`Retry-After` or
+	`RateLimit-Reset`), otherwise exponential backoff with full jitter."""
+	headers = headers or {}
+	reset_after = cint(headers.get("Retry-After") or headers.get("RateLimit-Reset"))
+	if reset_after > 0:
+		return min(reset_after + random.uniform(0, BACKOFF_BASE), MAX_RATE_LIMIT_WAIT)
+
+	return random.uniform(0, min(MAX_BACKOFF, BACKOFF_BASE * 2**attempt))
+
+
+def _update_rate_limit(headers):
+	remaining = headers.get("RateLimit-Remaining")
+	reset_after = headers.get("RateLimit-Reset")
+	if remaining is None or reset_after is None:
 		return
 
-	response_details = convert_str_to_json(response.text)
+	_rate_limit.update(remaining=cint(remaining), reset_at=time.monotonic() + cint(reset_after))
 
-	return response_details
 
+def _wait_for_rate_limit():
+	"""Spread remaining calls of current rate limit window evenly over rest of the window."""
+	if _rate_limit["remaining"] is None:
+		return
+
+	window_left = _rate_limit["reset_at"] - time.monotonic()
+	if window_left <= 0 or _rate_limit["remaining"] > PACING_THRESHOLD:
+		return
+
+	delay = window_left / max(_rate_limit["remaining"], 1)
+	time.sleep(min(delay, MAX_BACKOFF))
+
+
+def _log_error(url, response):
+	try:
+		content = json.loads(response.text)
+	except ValueError:
+		content = {"Message": response.reason, "InternalMessage": response.text}
 
-def get_headers():
-	headers = {}
-	headers["Authorization"] = "apikey " + frappe.db.get_single_value("Zenoti Settings", "api_key")
-	return headers
+	frappe.get_doc(
+		{
+			"doctype": "Zenoti Error Logs",
+			"title": content.get("Message"),
+			"error_message": content.get("InternalMessage"),
+			"request_url": url,
+			"status_code": content.get("StatusCode") or response.status_code,
+		}
+	).insert(ignore_permissions=True)
 
 
 def convert_str_to_json(string):
@@ -127,8 +214,8 @@ def get_item_details(item_dict, item_group, center):
 
 def get_all_centers():
 	url = api_url + "centers"
-	all_center = make_api_call(url)
-	return all_center.get("centers")
+	all_center = ZenotiClient().get(url)
+	return all_center.get("centers") if all_center else []
 
 
 def get_list_of_centers():
@@ -139,7 +226,7 @@ def get_list_of_centers():
 def get_list_of_items_in_a_center(center, item_group):
 	list_of_all_items_in_center = []
 	url1 = api_url + "centers/" + center + "/" + item_type[item_group] + "?size=100"
-	all_items_in_center = make_api_call(url1)
+	all_items_in_center = ZenotiClient().get(url1)
 	if all_items_in_center:
 		if item_group == "Memberships":
 			for item in all_items_in_center[item_type[item_group]]:
@@ -163,7 +250,9 @@ def get_list_of_items_in_a_center(center, item_group):
 						+ "page="
 						+ str(pg)
 					)
-					pagewise_items_in_center = make_api_call(url)
+					pagewise_items_in_center = ZenotiClient().get(url)
+					if not pagewise_items_in_center:
+						continue
 					for item in pagewise_items_in_center[item_type[item_group]]:
 						list_of_all_items_in_center.append(item)
 
@@ -188,7 +277,7 @@ def get_zenoti_category(category_id, center):
 	category = frappe.db.exists("Zenoti Category", {"category_id", category_id})
 	if not category:
 		url = api_url + "centers/" + str(center) + "/categories/" + str(category_id)
-		category_data = make_api_call(url)
+		category_data = ZenotiClient().get(url)
 		if category_data:
 			make_category(category_data)
 			category = category_data["id"]
@@ -264,7 +353,7 @@ def get_country(country_id):
 
 def get_list_of_countries():
 	url = api_url + "countries"
-	all_countries = make_api_call(url)
+	all_countries = ZenotiClient().get(url)
 	return all_countries
 
 
@@ -280,7 +369,7 @@ def get_state(country_id, state_id):
 
 def get_list_of_states_of_a_country(country_id):
 	url = api_url + "countries/" + country_id + "/states"
-	all_states = make_api_call(url)
+	all_states = ZenotiClient().get(url)
 	return all_states
 
 